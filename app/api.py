@@ -0,0 +1,133 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud
+from .config import FEED_PAGE_SIZE, COMMENTS_PAGE_SIZE, API_MAX_PAGE_SIZE
+from .covers import cover_src
+from .database import get_db
+from .models import Book, Review, User
+from .pagination import keyset_page, split_page
+from .schemas import (
+    ReviewOut, ReviewDetailOut, ReviewPage, CommentOut, CommentPage, ProfileOut, ProfilePage, BookOut, BookList
+)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ApiResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: BaseModel) -> bytes:
+        if orjson is None:
+            return content.model_dump_json().encode("utf-8")
+        return orjson.dumps(content.model_dump())
+
+
+router = APIRouter(prefix="/api/v1", tags=["api"])
+
+REVIEW_COLUMNS = (
+    Review.id, Review.book_title, Review.author, Review.rating, Review.text, Review.cover_url, Review.status,
+    Review.created_at, Review.like_count, Review.comment_count, User.username,
+)
+
+
+def _reviews(*columns):
+    return select(*REVIEW_COLUMNS, *columns).outerjoin(User, User.id == Review.user_id)
+
+
+def _review_out(row, model=ReviewOut, size: str = "feed"):
+    fields = dict(row._mapping)
+    fields["cover_url"] = cover_src(fields["cover_url"], size)
+    return model(**fields)
+
+
+async def _review_page(db: AsyncSession, query, before: str | None, limit: int):
+    query = keyset_page(query, Review.created_at, Review.id, before, limit)
+    rows, next_cursor = split_page((await db.execute(query)).all(), limit)
+    return [_review_out(row) for row in rows], next_cursor
+
+
+def _page_size(default: int):
+    return Query(default, ge=1, le=API_MAX_PAGE_SIZE)
+
+
+@router.get("/feed", response_model=ReviewPage)
+async def api_feed(
+    before: str | None = None,
+    limit: int = _page_size(FEED_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    items, next_cursor = await _review_page(db, _reviews(), before, limit)
+    return ApiResponse(ReviewPage(items=items, next_cursor=next_cursor))
+
+
+@router.get("/reviews/{review_id}", response_model=ReviewDetailOut)
+async def api_review(review_id: int, db: AsyncSession = Depends(get_db)):
+    row = (await db.execute(_reviews(Review.description).where(Review.id == review_id))).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Review not found")
+    return ApiResponse(_review_out(row, ReviewDetailOut, "detail"))
+
+
+@router.get("/reviews/{review_id}/comments", response_model=CommentPage)
+async def api_comments(
+    review_id: int,
+    after: str | None = None,
+    limit: int = _page_size(COMMENTS_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    rows, next_cursor = await crud.comment_page(db, review_id, after, limit)
+    return ApiResponse(CommentPage(items=[CommentOut(**row._mapping) for row in rows], next_cursor=next_cursor))
+
+
+@router.get("/users/{username}", response_model=ProfilePage)
+async def api_profile(
+    username: str,
+    before: str | None = None,
+    limit: int = _page_size(FEED_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    profile_user = (await db.execute(
+        select(
+            User.id, User.username, User.review_count, User.rating_sum, User.likes_received,
+            User.follower_count, User.following_count
+        ).where(User.username == username)
+    )).first()
+    if profile_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    items, next_cursor = await _review_page(db, _reviews().where(Review.user_id == profile_user.id), before, limit)
+    profile = ProfileOut(
+        username=profile_user.username,
+        review_count=profile_user.review_count,
+        average_rating=profile_user.rating_sum / profile_user.review_count if profile_user.review_count else 0,
+        likes_received=profile_user.likes_received,
+        follower_count=profile_user.follower_count,
+        following_count=profile_user.following_count
+    )
+    return ApiResponse(ProfilePage(user=profile, items=items, next_cursor=next_cursor))
+
+
+@router.get("/top", response_model=BookList)
+async def api_top_books(db: AsyncSession = Depends(get_db)):
+    rows = (await db.execute(
+        select(Book.id, Book.title, Book.author, Book.cover_url, Book.review_count, Book.rating_sum)
+        .where(Book.review_count > 0)
+        .order_by(Book.review_count.desc(), Book.id.desc())
+        .limit(20)
+    )).all()
+    return ApiResponse(BookList(items=[
+        BookOut(
+            id=row.id,
+            title=row.title,
+            author=row.author,
+            cover_url=cover_src(row.cover_url),
+            review_count=row.review_count,
+            average_rating=row.rating_sum / row.review_count
+        )
+        for row in rows
+    ]))
@@ -1,18 +1,51 @@
+import asyncio
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from jose import jwt
 from datetime import datetime, timedelta
-from .config import JWT_SECRET, ALGORITHM
+from .cache import TTLCache
+from .instrumentation import timed
+from .config import JWT_SECRET, ALGORITHM, BCRYPT_ROUNDS, BCRYPT_MAX_WORKERS, USER_CACHE_SIZE, USER_CACHE_TTL
 
 ACCESS_TOKEN_EXPIRE_DAYS = 1
 
-def hash_password(password: str) -> str:
+@dataclass(frozen=True)
+class CurrentUser:
+    id: int
+    username: str
+
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+_bcrypt_executor = ThreadPoolExecutor(max_workers=BCRYPT_MAX_WORKERS, thread_name_prefix="bcrypt")
+
+def _hash_password(password: str) -> str:
     pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(pwd_bytes, salt).decode('utf-8')
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    with timed("bcrypt"):
+        return await loop.run_in_executor(_bcrypt_executor, _hash_password, password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    with timed("bcrypt"):
+        return await loop.run_in_executor(_bcrypt_executor, _verify_password, plain_password, hashed_password)
+
+def needs_rehash(hashed_password: str) -> bool:
+    try:
+        return int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+def create_user_token(user) -> str:
+    return create_access_token(data={"sub": str(user.id), "name": user.username})
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(days=ACCESS_TOKEN_EXPIRE_DAYS)
@@ -0,0 +1,95 @@
+from sqlalchemy import select, update, func, literal, case, String
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import DEFAULT_COVER_URL
+from .models import Book, Review
+
+
+def book_key(title, author):
+    def normalize(value):
+        return func.lower(func.regexp_replace(func.btrim(value), r"\s+", " ", "g"))
+    return normalize(title) + "|" + normalize(author)
+
+
+async def get_or_create_book(db: AsyncSession, title: str, author: str, cover_url: str | None) -> int:
+    stmt = insert(Book).values(
+        title=title,
+        author=author,
+        normalized_key=book_key(literal(title, String), literal(author, String)),
+        cover_url=cover_url
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Book.normalized_key],
+        set_={
+            "cover_url": case(
+                (Book.cover_url.is_(None) | (Book.cover_url == DEFAULT_COVER_URL), stmt.excluded.cover_url),
+                else_=Book.cover_url
+            )
+        }
+    ).returning(Book.id)
+    return (await db.execute(stmt)).scalar_one()
+
+
+async def adjust_book_stats(db: AsyncSession, book_id: int | None, count_delta: int, rating_delta: int):
+    if book_id is None:
+        return
+    await db.execute(
+        update(Book)
+        .where(Book.id == book_id)
+        .values(
+            review_count=Book.review_count + count_delta,
+            rating_sum=Book.rating_sum + rating_delta
+        )
+    )
+
+
+async def refresh_book_stats(db: AsyncSession, book_id: int | None):
+    if book_id is None:
+        return
+    await db.execute(
+        update(Book)
+        .where(Book.id == book_id)
+        .values(
+            review_count=select(func.count(Review.id)).where(Review.book_id == book_id).scalar_subquery(),
+            rating_sum=select(func.coalesce(func.sum(Review.rating), 0)).where(Review.book_id == book_id).scalar_subquery()
+        )
+    )
+
+
+async def rebuild_book_stats(db: AsyncSession) -> int:
+    key = book_key(Review.book_title, Review.author)
+    missing = (
+        select(Review.book_title, Review.author, key, Review.cover_url)
+        .where(Review.book_id.is_(None))
+        .distinct(key)
+        .order_by(key, Review.created_at.desc())
+    )
+    await db.execute(
+        insert(Book)
+        .from_select(["title", "author", "normalized_key", "cover_url"], missing)
+        .on_conflict_do_nothing(index_elements=[Book.normalized_key])
+    )
+    await db.execute(
+        update(Review)
+        .where(Review.book_id.is_(None))
+        .values(book_id=select(Book.id).where(Book.normalized_key == key).scalar_subquery())
+    )
+
+    stats = (
+        select(
+            Review.book_id,
+            func.count(Review.id).label("review_count"),
+            func.sum(Review.rating).label("rating_sum")
+        )
+        .group_by(Review.book_id)
+        .subquery()
+    )
+    await db.execute(update(Book).values(review_count=0, rating_sum=0))
+    result = await db.execute(
+        update(Book)
+        .where(Book.id == stats.c.book_id)
+        .values(review_count=stats.c.review_count, rating_sum=stats.c.rating_sum)
+    )
+    await db.commit()
+    return result.rowcount
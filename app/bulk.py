@@ -0,0 +1,207 @@
+import asyncio
+import csv
+import io
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import islice
+
+from pydantic import ValidationError
+from sqlalchemy import select, update, insert, values, column, bindparam, case, func, Integer, String
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .books import book_key
+from .config import DEFAULT_COVER_URL, IMPORT_BATCH_SIZE, IMPORT_ENRICH_CONCURRENCY
+from .covers import COVER_PREFIX, proxy_cover_urls
+from .crud import adjust_user_stats
+from .models import Book, Cover, Review
+from .schemas import ReviewImport
+from .utils import fetch_book_info
+
+EXPORT_FIELDS = ["book_title", "author", "rating", "text", "description", "cover_url", "status", "created_at"]
+GOODREADS_SHELVES = {"read": "Прочитано", "currently-reading": "Читаю сейчас", "to-read": "В планах"}
+MAX_REPORTED_ERRORS = 50
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    skipped: int = 0
+    errors: list = field(default_factory=list)
+
+    def reject(self, line: int, message: str):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+def _goodreads_row(row: dict) -> dict:
+    rating = row.get("My Rating") or "0"
+    created_at = (row.get("Date Read") or row.get("Date Added") or "").strip()
+    return {
+        "book_title": (row.get("Title") or "").strip(),
+        "author": (row.get("Author") or "").strip(),
+        "rating": int(rating) * 2 if rating.isdigit() else rating,
+        "text": (row.get("My Review") or "").replace("<br/>", "\n").strip(),
+        "status": GOODREADS_SHELVES.get(row.get("Exclusive Shelf"), "Прочитано"),
+        "created_at": created_at.replace("/", "-") or None,
+    }
+
+
+def read_rows(stream, fmt: str):
+    if fmt == "jsonl":
+        for line_no, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                yield line_no, f"invalid JSON: {e}"
+                continue
+            if not isinstance(data, dict):
+                yield line_no, f"expected a JSON object, got {type(data).__name__}"
+                continue
+            yield line_no, data
+        return
+
+    reader = csv.DictReader(stream)
+    goodreads = "Title" in (reader.fieldnames or [])
+    for line_no, row in enumerate(reader, start=2):
+        yield line_no, _goodreads_row(row) if goodreads else row
+
+
+async def _batches(rows, size: int):
+    rows = iter(rows)
+    while batch := await asyncio.to_thread(lambda: list(islice(rows, size))):
+        yield batch
+
+
+async def _enrich(reviews: list[ReviewImport], semaphore: asyncio.Semaphore):
+    async def one(review: ReviewImport):
+        if review.description and review.cover_url:
+            return
+        async with semaphore:
+            info = await fetch_book_info(review.book_title)
+        if info:
+            review.description = review.description or info["description"] or None
+            review.cover_url = review.cover_url or info["cover_url"] or None
+
+    await asyncio.gather(*(one(review) for review in reviews))
+
+
+async def _book_ids(db: AsyncSession, reviews: list[ReviewImport]) -> list[int]:
+    incoming = values(
+        column("idx", Integer), column("title", String), column("author", String), column("cover_url", String),
+        name="incoming"
+    ).data([(i, r.book_title, r.author, r.cover_url) for i, r in enumerate(reviews)])
+    key = book_key(incoming.c.title, incoming.c.author)
+
+    stmt = pg_insert(Book).from_select(
+        ["title", "author", "normalized_key", "cover_url"],
+        select(incoming.c.title, incoming.c.author, key, incoming.c.cover_url).distinct(key).order_by(key)
+    )
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[Book.normalized_key],
+        set_={
+            "cover_url": case(
+                (Book.cover_url.is_(None) | (Book.cover_url == DEFAULT_COVER_URL), stmt.excluded.cover_url),
+                else_=Book.cover_url
+            )
+        }
+    ))
+    rows = await db.execute(select(incoming.c.idx, Book.id).join(Book, Book.normalized_key == key))
+    ids = dict(rows.all())
+    return [ids[i] for i in range(len(reviews))]
+
+
+async def _insert_batch(db: AsyncSession, user_id: int, reviews: list[ReviewImport]):
+    covers = await proxy_cover_urls(db, [review.cover_url for review in reviews])
+    for review, cover_url in zip(reviews, covers):
+        review.cover_url = cover_url or DEFAULT_COVER_URL
+    book_ids = await _book_ids(db, reviews)
+    now = datetime.now(timezone.utc)
+    await db.execute(insert(Review), [
+        {**review.model_dump(), "created_at": review.created_at or now, "user_id": user_id, "book_id": book_id}
+        for review, book_id in zip(reviews, book_ids)
+    ])
+
+    per_book = defaultdict(lambda: [0, 0])
+    for review, book_id in zip(reviews, book_ids):
+        per_book[book_id][0] += 1
+        per_book[book_id][1] += review.rating
+    books = Book.__table__
+    await db.execute(
+        update(books)
+        .where(books.c.id == bindparam("b_id"))
+        .values(
+            review_count=books.c.review_count + bindparam("count_delta"),
+            rating_sum=books.c.rating_sum + bindparam("rating_delta")
+        ),
+        [{"b_id": b, "count_delta": c, "rating_delta": r} for b, (c, r) in per_book.items()]
+    )
+    await adjust_user_stats(db, user_id, reviews=len(reviews), rating=sum(r.rating for r in reviews))
+    await db.commit()
+
+
+async def import_reviews(
+    db: AsyncSession,
+    user_id: int,
+    rows,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    enrich: bool = True,
+    concurrency: int = IMPORT_ENRICH_CONCURRENCY,
+) -> ImportResult:
+    result = ImportResult()
+    semaphore = asyncio.Semaphore(concurrency)
+    async for batch in _batches(rows, batch_size):
+        valid = []
+        for line_no, data in batch:
+            if isinstance(data, str):
+                result.reject(line_no, data)
+                continue
+            try:
+                valid.append(ReviewImport.model_validate(data))
+            except ValidationError as e:
+                error = e.errors()[0]
+                result.reject(line_no, f"{'.'.join(map(str, error['loc']))}: {error['msg']}")
+        if not valid:
+            continue
+        if enrich:
+            await _enrich(valid, semaphore)
+        await _insert_batch(db, user_id, valid)
+        result.imported += len(valid)
+    return result
+
+
+async def export_reviews(db: AsyncSession, user_id: int, fmt: str):
+    cover_url = case(
+        (Review.cover_url == DEFAULT_COVER_URL, None),
+        else_=func.coalesce(Cover.source_url, Review.cover_url)
+    ).label("cover_url")
+    query = (
+        select(*(cover_url if name == "cover_url" else getattr(Review, name) for name in EXPORT_FIELDS))
+        .outerjoin(Cover, Cover.hash == func.substr(Review.cover_url, len(COVER_PREFIX) + 1))
+        .where(Review.user_id == user_id)
+        .order_by(Review.created_at, Review.id)
+        .execution_options(yield_per=500)
+    )
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    if fmt == "csv":
+        writer.writeheader()
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    async for review in (await db.stream(query)).mappings():
+        row = dict(review)
+        row["created_at"] = row["created_at"].isoformat() if row["created_at"] else None
+        if fmt == "jsonl":
+            yield json.dumps(row, ensure_ascii=False) + "\n"
+            continue
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
@@ -0,0 +1,267 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from .auth_utils import user_cache
+from .config import INVALIDATION_BUS_ENABLED, INVALIDATION_CHANNEL, INVALIDATION_FLUSH_MS
+from .database import DATABASE_URL
+from .page_cache import page_cache
+from .timeline import clear_pull_authors
+from .utils import clear_book_cache
+
+logger = logging.getLogger("bookmind.bus")
+
+MAX_PAYLOAD = 7900
+RECONNECT_MAX_DELAY = 30.0
+
+
+class _Stats:
+    def __init__(self):
+        self.published_events = 0
+        self.published_batches = 0
+        self.coalesced = 0
+        self.received_events = 0
+        self.received_batches = 0
+        self.lag_last_ms = 0.0
+        self.lag_max_ms = 0.0
+        self.lag_total_ms = 0.0
+        self.reconnects = 0
+
+
+class InvalidationBus:
+    def __init__(self, dsn: str, channel: str, flush_interval: float, enabled: bool = True):
+        self.dsn = dsn
+        self.channel = channel
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self.worker_id = uuid.uuid4().hex[:12]
+        self.stats = _Stats()
+        self._handlers = {}
+        self._reset_handlers = []
+        self._pending = {}
+        self._conn = None
+        self._connected_once = False
+        self._wakeup = None
+        self._task = None
+        self._running = False
+
+    def handler(self, kind: str):
+        def register(fn):
+            self._handlers[kind] = fn
+            return fn
+        return register
+
+    def on_reset(self, fn):
+        self._reset_handlers.append(fn)
+        return fn
+
+    def _apply(self, kind: str, args: dict):
+        handler = self._handlers.get(kind)
+        if handler is None:
+            logger.warning("no handler for invalidation event %s", kind)
+            return
+        handler(**args)
+
+    def publish(self, kind: str, **args):
+        self._apply(kind, args)
+        if not self._running:
+            return
+        key = json.dumps([kind, args], sort_keys=True, separators=(",", ":"))
+        if key in self._pending:
+            self.stats.coalesced += 1
+        else:
+            self._pending[key] = time.time()
+        self._wakeup.set()
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("malformed invalidation payload: %s", payload[:200])
+            return
+        if message.get("w") == self.worker_id:
+            return
+        lag_ms = max(0.0, time.time() - message["t"]) * 1000
+        self.stats.received_batches += 1
+        self.stats.lag_last_ms = lag_ms
+        self.stats.lag_max_ms = max(self.stats.lag_max_ms, lag_ms)
+        self.stats.lag_total_ms += lag_ms
+        for kind, args in message["e"]:
+            self.stats.received_events += 1
+            try:
+                self._apply(kind, args)
+            except Exception:
+                logger.exception("invalidation handler %s failed", kind)
+
+    def _on_terminate(self, connection):
+        if connection is self._conn:
+            self._conn = None
+            if self._running:
+                self._wakeup.set()
+
+    def _reset(self):
+        for fn in self._reset_handlers:
+            fn()
+
+    async def _ensure_connected(self):
+        if self._conn is not None and not self._conn.is_closed():
+            return
+        self._conn = await asyncpg.connect(self.dsn)
+        self._conn.add_termination_listener(self._on_terminate)
+        await self._conn.add_listener(self.channel, self._on_notify)
+        if self._connected_once:
+            self.stats.reconnects += 1
+            self._reset()
+        self._connected_once = True
+
+    def _payloads(self, batch: dict):
+        chunk, size, queued_at = [], 0, None
+        for key, enqueued in batch.items():
+            if chunk and size + len(key) + 64 > MAX_PAYLOAD:
+                yield chunk, queued_at
+                chunk, size, queued_at = [], 0, None
+            chunk.append(key)
+            size += len(key) + 1
+            queued_at = enqueued if queued_at is None else min(queued_at, enqueued)
+        if chunk:
+            yield chunk, queued_at
+
+    async def _send(self, batch: dict):
+        for keys, queued_at in self._payloads(batch):
+            payload = '{"w":"%s","t":%.6f,"e":[%s]}' % (self.worker_id, queued_at, ",".join(keys))
+            await self._conn.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+            self.stats.published_batches += 1
+            self.stats.published_events += len(keys)
+
+    async def _flush(self):
+        await self._ensure_connected()
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        try:
+            await self._send(batch)
+        except BaseException:
+            for key, enqueued in batch.items():
+                self._pending.setdefault(key, enqueued)
+            raise
+
+    async def _run(self):
+        delay = 0.0
+        while self._running:
+            await self._wakeup.wait()
+            await asyncio.sleep(self.flush_interval + delay)
+            self._wakeup.clear()
+            try:
+                await self._flush()
+                delay = 0.0
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                logger.warning("invalidation bus unavailable: %r", e)
+                await self._close()
+                delay = min(max(delay * 2, 0.5), RECONNECT_MAX_DELAY)
+                self._wakeup.set()
+
+    async def _close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            try:
+                await conn.close(timeout=2)
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError, asyncio.TimeoutError):
+                conn.terminate()
+
+    async def start(self):
+        if not self.enabled or self._running:
+            return
+        self._running = True
+        self._wakeup = asyncio.Event()
+        try:
+            await self._ensure_connected()
+        except (OSError, asyncpg.PostgresError) as e:
+            logger.warning("invalidation bus unavailable: %r", e)
+            self._wakeup.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        try:
+            await self._flush()
+        except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+            logger.warning("could not flush invalidations on shutdown: %r", e)
+        await self._close()
+
+    def snapshot(self) -> dict:
+        stats = self.stats
+        return {
+            "enabled": self.enabled,
+            "worker_id": self.worker_id,
+            "connected": self._conn is not None and not self._conn.is_closed(),
+            "pending": len(self._pending),
+            "published_events": stats.published_events,
+            "published_batches": stats.published_batches,
+            "coalesced": stats.coalesced,
+            "received_events": stats.received_events,
+            "received_batches": stats.received_batches,
+            "lag_last_ms": round(stats.lag_last_ms, 3),
+            "lag_max_ms": round(stats.lag_max_ms, 3),
+            "lag_avg_ms": round(stats.lag_total_ms / stats.received_batches, 3) if stats.received_batches else 0,
+            "reconnects": stats.reconnects,
+        }
+
+
+bus = InvalidationBus(
+    make_url(DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False),
+    INVALIDATION_CHANNEL,
+    INVALIDATION_FLUSH_MS / 1000,
+    INVALIDATION_BUS_ENABLED,
+)
+
+
+@bus.handler("review_created")
+def review_created(review_id: int, user_id: int):
+    page_cache.invalidate("feed", f"user:{user_id}")
+
+
+@bus.handler("review_updated")
+def review_updated(review_id: int, user_id: int):
+    page_cache.invalidate("feed", f"review:{review_id}", f"user:{user_id}")
+
+
+@bus.handler("review_deleted")
+def review_deleted(review_id: int, user_id: int):
+    page_cache.invalidate("feed", "top", f"user:{user_id}", f"review:{review_id}")
+
+
+@bus.handler("like_toggled")
+def like_toggled(review_id: int, owner_id: int | None):
+    page_cache.invalidate(f"review:{review_id}", f"user:{owner_id}")
+
+
+@bus.handler("comment_added")
+def comment_added(review_id: int):
+    page_cache.invalidate(f"review:{review_id}")
+
+
+@bus.handler("user")
+def user_changed(user_id: int):
+    user_cache.delete(user_id)
+
+
+@bus.handler("pages")
+def pages(tags: list[str]):
+    page_cache.invalidate(*tags)
+
+
+@bus.on_reset
+def clear_local_caches():
+    page_cache.clear()
+    user_cache.clear()
+    clear_book_cache()
+    clear_pull_authors()
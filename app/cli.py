@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import os
+import sys
+from contextlib import nullcontext
+
+from sqlalchemy import select
+
+from .database import async_session
+from .books import rebuild_book_stats
+from .bulk import read_rows, import_reviews, export_reviews
+from .recommend import refresh_recommendations
+from .models import User
+from .config import IMPORT_BATCH_SIZE, RECOMMEND_TOP_K
+
+
+def file_format(path: str, fmt: str | None) -> str:
+    if fmt:
+        return fmt
+    return "jsonl" if os.path.splitext(path)[1].lower() in (".jsonl", ".json") else "csv"
+
+
+async def find_user_id(db, username: str) -> int:
+    user_id = (await db.execute(select(User.id).where(User.username == username))).scalar_one_or_none()
+    if user_id is None:
+        raise SystemExit(f"User {username!r} not found")
+    return user_id
+
+
+async def rebuild_books(args):
+    async with async_session() as db:
+        updated = await rebuild_book_stats(db)
+    print(f"Rebuilt aggregates for {updated} books")
+
+
+async def import_file(args):
+    async with async_session() as db:
+        user_id = await find_user_id(db, args.user)
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            result = await import_reviews(
+                db, user_id, read_rows(stream, file_format(args.path, args.format)),
+                batch_size=args.batch_size, enrich=not args.no_enrich
+            )
+    for line, message in result.errors:
+        print(f"line {line}: {message}", file=sys.stderr)
+    print(f"Imported {result.imported} reviews, skipped {result.skipped}")
+
+
+async def export_file(args):
+    fmt = args.format or (file_format(args.output, None) if args.output else "jsonl")
+    async with async_session() as db:
+        user_id = await find_user_id(db, args.user)
+        with open(args.output, "w", encoding="utf-8", newline="") if args.output else nullcontext(sys.stdout) as out:
+            async for chunk in export_reviews(db, user_id, fmt):
+                out.write(chunk)
+
+
+async def recommendations(args):
+    async with async_session() as db:
+        run = await refresh_recommendations(db, full=args.full, top_k=args.top_k)
+    print(f"{run.mode} refresh: neighbors recomputed for {run.reviews} reviews, recommendations for {run.users} users")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="BookMind maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-books", help="recompute book review counts and ratings from reviews")
+    rebuild.set_defaults(handler=rebuild_books)
+
+    importer = commands.add_parser("import-reviews", help="import reviews from a Goodreads CSV or a JSONL file")
+    importer.add_argument("path")
+    importer.add_argument("--user", required=True, help="username that will own the reviews")
+    importer.add_argument("--format", choices=["csv", "jsonl"])
+    importer.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    importer.add_argument("--no-enrich", action="store_true", help="skip Google Books description and cover lookup")
+    importer.set_defaults(handler=import_file)
+
+    exporter = commands.add_parser("export-reviews", help="export a user's reviews as CSV or JSONL")
+    exporter.add_argument("--user", required=True)
+    exporter.add_argument("--format", choices=["csv", "jsonl"])
+    exporter.add_argument("-o", "--output", help="file to write instead of stdout")
+    exporter.set_defaults(handler=export_file)
+
+    recommend = commands.add_parser("refresh-recommendations", help="recompute co-like neighbors for the personalized feed")
+    recommend.add_argument("--full", action="store_true", help="recompute everything instead of reviews liked or unliked since the last run")
+    recommend.add_argument("--top-k", type=int, default=RECOMMEND_TOP_K)
+    recommend.set_defaults(handler=recommendations)
+
+    args = parser.parse_args(argv)
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
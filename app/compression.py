@@ -0,0 +1,86 @@
+import gzip
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "image/svg+xml")
+EXCLUDED_TYPES = ("text/event-stream",)
+
+
+def _accepts(accept_encoding: str) -> set[str]:
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            if params and float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.strip())
+    return accepted
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 500, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _encoding(self, scope) -> str | None:
+        accepted = _accepts(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_wrapper(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+            pending, start = start, None
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                headers = MutableHeaders(raw=pending["headers"])
+                body = message.get("body", b"")
+                content_type = headers.get("content-type", "")
+                if (
+                    len(body) >= self.minimum_size
+                    and "content-encoding" not in headers
+                    and content_type.startswith(COMPRESSIBLE_TYPES)
+                    and not content_type.startswith(EXCLUDED_TYPES)
+                ):
+                    body = self._compress(encoding, body)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    headers.add_vary_header("Accept-Encoding")
+                    message = {**message, "body": body}
+            await send(pending)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -4,6 +4,80 @@ from dotenv import load_dotenv
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", "5"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_SHOW_STATEMENTS = os.getenv("METRICS_SHOW_STATEMENTS", "false").lower() in ("1", "true", "yes")
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "false").lower() in ("1", "true", "yes")
+N1_THRESHOLD = int(os.getenv("N1_THRESHOLD", "5"))
 JWT_SECRET = os.getenv("JWT_SECRET", "default_secret_key")
 ALGORITHM = "HS256"
-GOOGLE_BOOKS_API_KEY = os.getenv("GOOGLE_BOOKS_API_KEY", "")
\ No newline at end of file
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_MAX_WORKERS = int(os.getenv("BCRYPT_MAX_WORKERS", "4"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))
+GOOGLE_BOOKS_API_KEY = os.getenv("GOOGLE_BOOKS_API_KEY", "")
+GOOGLE_BOOKS_URL = os.getenv("GOOGLE_BOOKS_URL", "https://www.googleapis.com/books/v1/volumes")
+GOOGLE_BOOKS_TIMEOUT = float(os.getenv("GOOGLE_BOOKS_TIMEOUT", "5"))
+GOOGLE_BOOKS_CACHE_SIZE = int(os.getenv("GOOGLE_BOOKS_CACHE_SIZE", "2048"))
+GOOGLE_BOOKS_CACHE_TTL = float(os.getenv("GOOGLE_BOOKS_CACHE_TTL", "86400"))
+GOOGLE_BOOKS_NEGATIVE_TTL = float(os.getenv("GOOGLE_BOOKS_NEGATIVE_TTL", "3600"))
+GOOGLE_BOOKS_CACHE_PATH = os.getenv("GOOGLE_BOOKS_CACHE_PATH", "")
+
+DEFAULT_COVER_URL = "/covers/placeholder.svg"
+
+FEED_PAGE_SIZE = int(os.getenv("FEED_PAGE_SIZE", "20"))
+COMMENTS_PAGE_SIZE = int(os.getenv("COMMENTS_PAGE_SIZE", "50"))
+PAGE_CACHE_SIZE = int(os.getenv("PAGE_CACHE_SIZE", "512"))
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL", "60"))
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+IMPORT_ENRICH_CONCURRENCY = int(os.getenv("IMPORT_ENRICH_CONCURRENCY", "8"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", "2"))
+JOB_RETRY_MAX_DELAY = float(os.getenv("JOB_RETRY_MAX_DELAY", "300"))
+JOBS_DURABLE = os.getenv("JOBS_DURABLE", "false").lower() in ("1", "true", "yes")
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_SHUTDOWN_TIMEOUT = float(os.getenv("JOB_SHUTDOWN_TIMEOUT", "10"))
+RECOMMEND_TOP_K = int(os.getenv("RECOMMEND_TOP_K", "20"))
+RECOMMEND_MIN_COMMON = int(os.getenv("RECOMMEND_MIN_COMMON", "2"))
+RECOMMEND_MIN_RATING = int(os.getenv("RECOMMEND_MIN_RATING", "8"))
+RECOMMEND_BLOCK_SIZE = int(os.getenv("RECOMMEND_BLOCK_SIZE", "2000"))
+RECOMMEND_MAX_ITEMS = int(os.getenv("RECOMMEND_MAX_ITEMS", "500"))
+SSE_KEEPALIVE = float(os.getenv("SSE_KEEPALIVE", "15"))
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+COVER_CACHE_DIR = os.getenv("COVER_CACHE_DIR", "cover_cache")
+COVER_CACHE_MAX_BYTES = int(os.getenv("COVER_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+COVER_MAX_SOURCE_BYTES = int(os.getenv("COVER_MAX_SOURCE_BYTES", str(5 * 1024 * 1024)))
+COVER_NEGATIVE_TTL = float(os.getenv("COVER_NEGATIVE_TTL", "600"))
+COVER_JPEG_QUALITY = int(os.getenv("COVER_JPEG_QUALITY", "82"))
+COVER_SIZES = {"feed": (400, 600), "detail": (800, 1200)}
+COVER_ALLOWED_HOSTS = {
+    host.strip().lower()
+    for host in os.getenv("COVER_ALLOWED_HOSTS", "books.google.com,books.googleusercontent.com").split(",")
+    if host.strip()
+}
+FANOUT_MAX_FOLLOWERS = int(os.getenv("FANOUT_MAX_FOLLOWERS", "10000"))
+TIMELINE_FANOUT_BATCH = int(os.getenv("TIMELINE_FANOUT_BATCH", "1000"))
+TIMELINE_BACKFILL = int(os.getenv("TIMELINE_BACKFILL", "50"))
+TIMELINE_PULL_AUTHORS_TTL = float(os.getenv("TIMELINE_PULL_AUTHORS_TTL", "60"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "100"))
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+SCHEMA_CHECK = os.getenv("SCHEMA_CHECK", "true").lower() in ("1", "true", "yes")
+TEMPLATE_BYTECODE_CACHE = os.getenv("TEMPLATE_BYTECODE_CACHE", "true").lower() in ("1", "true", "yes")
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", "")
+TEMPLATE_WARMUP = os.getenv("TEMPLATE_WARMUP", "true").lower() in ("1", "true", "yes")
+INVALIDATION_BUS_ENABLED = os.getenv("INVALIDATION_BUS_ENABLED", "true").lower() in ("1", "true", "yes")
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "bookmind_invalidation")
+INVALIDATION_FLUSH_MS = float(os.getenv("INVALIDATION_FLUSH_MS", "20"))
\ No newline at end of file
@@ -0,0 +1,304 @@
+import asyncio
+import contextlib
+import hashlib
+import io
+import os
+import re
+import tempfile
+import time
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import TTLCache, MISSING
+from .config import (
+    DEFAULT_COVER_URL, COVER_CACHE_DIR, COVER_CACHE_MAX_BYTES, COVER_MAX_SOURCE_BYTES, COVER_JPEG_QUALITY,
+    COVER_NEGATIVE_TTL, COVER_SIZES, COVER_ALLOWED_HOSTS
+)
+from .instrumentation import timed
+from .models import Cover
+from .utils import get_http_client
+
+COVER_PREFIX = "/covers/"
+COVER_CACHE_HEADERS = {"Cache-Control": "public, max-age=31536000, immutable"}
+MEDIA_TYPES = {"jpg": "image/jpeg", "png": "image/png", "gif": "image/gif", "webp": "image/webp"}
+TOUCH_INTERVAL = 3600
+EVICT_TO = 0.9
+MAX_REDIRECTS = 3
+
+PLACEHOLDER_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="400" height="600" viewBox="0 0 400 600">'
+    '<rect width="400" height="600" fill="#18181b"/>'
+    '<text x="200" y="300" fill="#ffffff" font-family="sans-serif" font-size="28" font-weight="bold" '
+    'text-anchor="middle" dominant-baseline="middle">NO COVER</text>'
+    '</svg>'
+)
+
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class CoverFetchError(Exception):
+    pass
+
+
+def cover_hash(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+def is_cover_hash(value: str) -> bool:
+    return bool(_HASH_RE.match(value))
+
+
+def cover_src(url: str | None, size: str = "feed") -> str:
+    if not url:
+        return DEFAULT_COVER_URL
+    if url.startswith(COVER_PREFIX) and url != DEFAULT_COVER_URL:
+        return f"{url}?size={size}"
+    return url
+
+
+def is_allowed_source(url: str) -> bool:
+    try:
+        parsed = httpx.URL(url)
+    except httpx.InvalidURL:
+        return False
+    return parsed.scheme in ("http", "https") and parsed.port is None and parsed.host in COVER_ALLOWED_HOSTS
+
+
+def is_local_cover(url: str) -> bool:
+    return url == DEFAULT_COVER_URL or (url.startswith(COVER_PREFIX) and is_cover_hash(url[len(COVER_PREFIX):]))
+
+
+async def proxy_cover_urls(db: AsyncSession, urls: list[str | None]) -> list[str | None]:
+    proxied, sources = [], {}
+    for url in urls:
+        if url and is_allowed_source(url):
+            digest = cover_hash(url)
+            sources[digest] = url
+            url = COVER_PREFIX + digest
+        elif url and not is_local_cover(url):
+            url = DEFAULT_COVER_URL
+        proxied.append(url)
+    if sources:
+        await db.execute(
+            insert(Cover)
+            .values([{"hash": digest, "source_url": url} for digest, url in sources.items()])
+            .on_conflict_do_nothing(index_elements=[Cover.hash])
+        )
+    return proxied
+
+
+async def proxy_cover_url(db: AsyncSession, url: str | None) -> str | None:
+    return (await proxy_cover_urls(db, [url]))[0]
+
+
+def _sniff(data: bytes) -> str | None:
+    if data.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if data.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _render(data: bytes, sizes: dict) -> dict:
+    ext = _sniff(data)
+    if ext is None:
+        raise CoverFetchError("not an image")
+    try:
+        from PIL import Image
+    except ImportError:
+        return {size: (data, ext) for size in sizes}
+
+    renditions = {}
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            image = source.convert("RGB")
+        for size, box in sizes.items():
+            thumb = image.copy()
+            thumb.thumbnail(box, Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            thumb.save(buffer, "JPEG", quality=COVER_JPEG_QUALITY, optimize=True, progressive=True)
+            renditions[size] = (buffer.getvalue(), "jpg")
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise CoverFetchError(f"cannot decode image: {e}") from e
+    return renditions
+
+
+class CoverCache:
+    def __init__(self, root: str, max_bytes: int, sizes: dict):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.sizes = sizes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.fetch_errors = 0
+        self.evictions = 0
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._failures = TTLCache(maxsize=4096, ttl=COVER_NEGATIVE_TTL)
+        self._evicting: asyncio.Task | None = None
+
+    def _path(self, digest: str, size: str, ext: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}-{size}.{ext}")
+
+    def lookup(self, digest: str, size: str):
+        for ext in MEDIA_TYPES:
+            path = self._path(digest, size, ext)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if time.time() - stat.st_mtime > TOUCH_INTERVAL:
+                try:
+                    os.utime(path)
+                except FileNotFoundError:
+                    continue
+                except OSError:
+                    pass
+            return path, stat, MEDIA_TYPES[ext]
+        return None
+
+    async def get(self, db: AsyncSession, digest: str, size: str):
+        found = await asyncio.to_thread(self.lookup, digest, size)
+        if found:
+            self.hits += 1
+            return found
+        self.misses += 1
+        if self._failures.get(digest) is not MISSING:
+            raise CoverFetchError("recently failed")
+        task = self._inflight.get(digest)
+        if task is None:
+            source_url = (await db.execute(select(Cover.source_url).where(Cover.hash == digest))).scalar_one_or_none()
+            if source_url is None:
+                return None
+            task = self._inflight.get(digest)
+            if task is None:
+                task = asyncio.create_task(self._fill(digest, source_url))
+                self._inflight[digest] = task
+                task.add_done_callback(lambda _: self._inflight.pop(digest, None))
+        await asyncio.shield(task)
+        return await asyncio.to_thread(self.lookup, digest, size)
+
+    async def _download(self, url: str) -> bytes:
+        try:
+            with timed("http"):
+                for _ in range(MAX_REDIRECTS + 1):
+                    if not is_allowed_source(url):
+                        raise CoverFetchError(f"host not allowed: {url}")
+                    async with get_http_client().stream("GET", url, follow_redirects=False) as response:
+                        if response.is_redirect:
+                            url = str(response.url.join(response.headers["location"]))
+                            continue
+                        if response.status_code != 200:
+                            raise CoverFetchError(f"HTTP {response.status_code}")
+                        return await self._read(response)
+        except httpx.HTTPError as e:
+            raise CoverFetchError(repr(e)) from e
+        raise CoverFetchError("too many redirects")
+
+    @staticmethod
+    async def _read(response) -> bytes:
+        chunks, received = [], 0
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            if received > COVER_MAX_SOURCE_BYTES:
+                raise CoverFetchError("source image too large")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _store(self, digest: str, data: bytes) -> int:
+        renditions = _render(data, self.sizes)
+        directory = os.path.join(self.root, digest[:2])
+        written = 0
+        try:
+            os.makedirs(directory, exist_ok=True)
+            for size, (body, ext) in renditions.items():
+                fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(body)
+                    os.replace(tmp_path, self._path(digest, size, ext))
+                except OSError:
+                    with contextlib.suppress(OSError):
+                        os.remove(tmp_path)
+                    raise
+                written += len(body)
+        except OSError as e:
+            raise CoverFetchError(f"cannot store cover: {e}") from e
+        return written
+
+    async def _fill(self, digest: str, source_url: str):
+        try:
+            data = await self._download(source_url)
+            written = await asyncio.to_thread(self._store, digest, data)
+        except CoverFetchError as e:
+            self.fetch_errors += 1
+            self._failures.set(digest, True)
+            print(f"Error fetching cover {source_url}: {e}")
+            raise
+        self.total_bytes += written
+        if self.total_bytes > self.max_bytes:
+            self.start()
+
+    def _evict(self) -> tuple[int, int]:
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes * EVICT_TO:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                evicted += 1
+        return total, evicted
+
+    async def _run_eviction(self):
+        total, evicted = await asyncio.to_thread(self._evict)
+        self.total_bytes = total
+        self.evictions += evicted
+
+    def start(self):
+        if self._evicting is None or self._evicting.done():
+            self._evicting = asyncio.create_task(self._run_eviction())
+
+    async def stop(self):
+        if self._evicting is not None:
+            await asyncio.gather(self._evicting, return_exceptions=True)
+
+    def snapshot(self) -> dict:
+        try:
+            import PIL  # noqa: F401
+            resize = "pillow"
+        except ImportError:
+            resize = "passthrough"
+        return {
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetch_errors": self.fetch_errors,
+            "evictions": self.evictions,
+            "inflight": len(self._inflight),
+            "resize": resize,
+        }
+
+
+cover_cache = CoverCache(COVER_CACHE_DIR, COVER_CACHE_MAX_BYTES, COVER_SIZES)
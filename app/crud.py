@@ -0,0 +1,207 @@
+from typing import NamedTuple
+
+from sqlalchemy import select, update, delete, exists, func, literal, case, or_, Integer
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Review, Comment, Like, User, Follow
+from .pagination import keyset_page, split_page
+from .books import adjust_book_stats
+
+
+class LikeToggle(NamedTuple):
+    liked: bool
+    like_count: int
+    owner_id: int | None
+
+
+class CommentAdded(NamedTuple):
+    comment: Comment
+    comment_count: int
+
+
+class FollowToggle(NamedTuple):
+    following: bool
+    follower_count: int
+
+
+async def adjust_user_stats(db: AsyncSession, user_id: int | None, reviews: int = 0, rating: int = 0, likes: int = 0):
+    if user_id is None:
+        return
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            review_count=User.review_count + reviews,
+            rating_sum=User.rating_sum + rating,
+            likes_received=User.likes_received + likes
+        )
+    )
+
+
+async def refresh_user_stats(db: AsyncSession, user_id: int):
+    own = select(Review.rating, Review.like_count).where(Review.user_id == user_id).subquery()
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            review_count=select(func.count()).select_from(own).scalar_subquery(),
+            rating_sum=select(func.coalesce(func.sum(own.c.rating), 0)).scalar_subquery(),
+            likes_received=select(func.coalesce(func.sum(own.c.like_count), 0)).scalar_subquery()
+        )
+    )
+
+
+async def liked_review_ids(db: AsyncSession, user, review_ids) -> set[int]:
+    review_ids = list(review_ids)
+    if not user or not review_ids:
+        return set()
+    result = await db.execute(
+        select(Like.review_id).where(Like.user_id == user.id, Like.review_id.in_(review_ids))
+    )
+    return set(result.scalars().all())
+
+
+async def comment_page(db: AsyncSession, review_id: int, after: str | None, limit: int):
+    query = (
+        select(Comment.id, Comment.text, Comment.created_at, User.username)
+        .outerjoin(User, User.id == Comment.user_id)
+        .where(Comment.review_id == review_id)
+    )
+    query = keyset_page(query, Comment.created_at, Comment.id, after, limit, newest_first=False)
+    return split_page((await db.execute(query)).all(), limit)
+
+
+async def toggle_like(db: AsyncSession, user_id: int, review_id: int):
+    deleted = (
+        delete(Like)
+        .where(Like.user_id == user_id, Like.review_id == review_id)
+        .returning(Like.id)
+        .cte("deleted")
+    )
+    inserted = (
+        insert(Like)
+        .from_select(
+            ["user_id", "review_id"],
+            select(literal(user_id, Integer), literal(review_id, Integer)).where(
+                ~exists(select(deleted.c.id)),
+                exists().where(Review.id == review_id)
+            )
+        )
+        .on_conflict_do_nothing(index_elements=["user_id", "review_id"])
+        .returning(Like.id)
+        .cte("inserted")
+    )
+    inserted_count = select(func.count()).select_from(inserted).scalar_subquery()
+    deleted_count = select(func.count()).select_from(deleted).scalar_subquery()
+    owner_id = select(Review.user_id).where(Review.id == review_id).scalar_subquery()
+    touched_users = (
+        update(User)
+        .where(or_(User.id == owner_id, User.id == user_id))
+        .values(
+            likes_received=User.likes_received + case(
+                (User.id == owner_id, inserted_count - deleted_count), else_=0
+            ),
+            likes_updated_at=case((User.id == user_id, func.now()), else_=User.likes_updated_at)
+        )
+        .returning(User.id)
+        .cte("touched_users")
+    )
+    stmt = (
+        update(Review)
+        .where(Review.id == review_id)
+        .values(like_count=Review.like_count + inserted_count - deleted_count, likes_updated_at=func.now())
+        .returning(inserted_count, deleted_count, Review.like_count, Review.user_id)
+        .add_cte(touched_users)
+    )
+    row = (await db.execute(stmt)).first()
+    if row is None:
+        await db.commit()
+        return None
+    liked = bool(row[0])
+    if not row[0] and not row[1]:
+        liked = (await db.execute(
+            select(exists().where(Like.user_id == user_id, Like.review_id == review_id))
+        )).scalar()
+    await db.commit()
+    return LikeToggle(liked, row[2], row[3])
+
+
+async def add_comment(db: AsyncSession, user_id: int, review_id: int, text: str):
+    result = await db.execute(
+        update(Review)
+        .where(Review.id == review_id)
+        .values(comment_count=Review.comment_count + 1)
+        .returning(Review.comment_count)
+    )
+    comment_count = result.scalar_one_or_none()
+    if comment_count is None:
+        await db.rollback()
+        return None
+    comment = Comment(text=text, user_id=user_id, review_id=review_id)
+    db.add(comment)
+    await db.commit()
+    return CommentAdded(comment, comment_count)
+
+
+async def is_following(db: AsyncSession, follower, followee_id: int) -> bool:
+    if not follower or follower.id == followee_id:
+        return False
+    result = await db.execute(
+        select(exists().where(Follow.follower_id == follower.id, Follow.followee_id == followee_id))
+    )
+    return result.scalar()
+
+
+async def toggle_follow(db: AsyncSession, follower_id: int, followee_id: int) -> FollowToggle:
+    removed = await db.execute(
+        delete(Follow)
+        .where(Follow.follower_id == follower_id, Follow.followee_id == followee_id)
+        .returning(Follow.followee_id)
+    )
+    if removed.first():
+        delta = -1
+    else:
+        added = await db.execute(
+            insert(Follow)
+            .values(follower_id=follower_id, followee_id=followee_id)
+            .on_conflict_do_nothing()
+            .returning(Follow.followee_id)
+        )
+        delta = 1 if added.first() else 0
+    await db.execute(
+        update(User).where(User.id == follower_id).values(following_count=User.following_count + delta)
+    )
+    follower_count = (await db.execute(
+        update(User)
+        .where(User.id == followee_id)
+        .values(follower_count=User.follower_count + delta)
+        .returning(User.follower_count)
+    )).scalar_one()
+    following = delta > 0
+    if not delta:
+        following = (await db.execute(
+            select(exists().where(Follow.follower_id == follower_id, Follow.followee_id == followee_id))
+        )).scalar()
+    return FollowToggle(following, follower_count)
+
+
+async def delete_review(db: AsyncSession, review: Review):
+    removed_likes = await db.execute(delete(Like).where(Like.review_id == review.id).returning(Like.user_id))
+    likers = removed_likes.scalars().all()
+    likes = len(likers)
+    if likers:
+        await db.execute(update(User).where(User.id.in_(likers)).values(likes_updated_at=func.now()))
+    await db.execute(delete(Comment).where(Comment.review_id == review.id))
+    await db.execute(delete(Review).where(Review.id == review.id))
+    await adjust_book_stats(db, review.book_id, -1, -review.rating)
+    await adjust_user_stats(db, review.user_id, reviews=-1, rating=-review.rating, likes=-likes)
+    await db.commit()
+
+
+async def profile_reviews(db: AsyncSession, user_id: int, before: str | None, limit: int):
+    query = keyset_page(
+        select(Review).where(Review.user_id == user_id),
+        Review.created_at, Review.id, before, limit
+    )
+    return split_page((await db.execute(query)).scalars().all(), limit)
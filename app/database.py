@@ -1,20 +1,69 @@
+import random
+import time
+
+from fastapi import Request
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
-from .config import DATABASE_URL
+from .config import (
+    DATABASE_URL, DATABASE_REPLICA_URLS, DB_REPLICA_STICKY_SECONDS, DB_POOL_SIZE, DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT_MS
+)
+from .metrics import InstrumentedQueuePool, instrument_engine
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def async_url(url: str | None) -> str | None:
+    if url and url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+asyncpg://", 1)
+    if url and url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
 
-if DATABASE_URL and DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql+asyncpg://", 1)
-elif DATABASE_URL and DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+DATABASE_URL = async_url(DATABASE_URL)
 
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+def engine_options(url: str) -> dict:
+    options = {
+        "echo": False,
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if DB_STATEMENT_TIMEOUT_MS and make_url(url).get_driver_name() == "asyncpg":
+        options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+    return options
+
+
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+instrument_engine(engine)
 
 async_session = async_sessionmaker(engine, expire_on_commit=False)
 
+replica_engines = []
+for replica_url in map(async_url, DATABASE_REPLICA_URLS):
+    replica_engine = create_async_engine(replica_url, **engine_options(replica_url))
+    instrument_engine(replica_engine)
+    replica_engines.append(replica_engine)
+replica_sessions = [async_sessionmaker(e, expire_on_commit=False) for e in replica_engines]
+
 class Base(DeclarativeBase):
     pass
 
-async def get_db():
-    async with async_session() as session:
+def session_factory(request: Request):
+    if request.method not in SAFE_METHODS:
+        if replica_sessions:
+            request.session["db_primary_until"] = time.time() + DB_REPLICA_STICKY_SECONDS
+        return async_session
+    if not replica_sessions or request.session.get("db_primary_until", 0) > time.time():
+        return async_session
+    return random.choice(replica_sessions)
+
+async def get_db(request: Request):
+    async with session_factory(request)() as session:
         yield session
\ No newline at end of file
@@ -0,0 +1,72 @@
+import asyncio
+import json
+from contextlib import contextmanager
+
+from .config import SSE_KEEPALIVE, SSE_QUEUE_SIZE
+
+_CLOSED = object()
+
+
+class EventBroker:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._channels: dict[str, set[asyncio.Queue]] = {}
+        self.published = 0
+        self.dropped = 0
+
+    @contextmanager
+    def subscribe(self, *channels: str):
+        queue = asyncio.Queue(self.queue_size)
+        for channel in channels:
+            self._channels.setdefault(channel, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            for channel in channels:
+                subscribers = self._channels.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._channels[channel]
+
+    def publish(self, channel: str, event: str, data: dict):
+        subscribers = self._channels.get(channel)
+        if not subscribers:
+            return
+        self.published += 1
+        message = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+        for queue in list(subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                subscribers.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait(_CLOSED)
+
+    def snapshot(self) -> dict:
+        return {
+            "channels": len(self._channels),
+            "subscribers": len({id(q) for queues in self._channels.values() for q in queues}),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+broker = EventBroker(SSE_QUEUE_SIZE)
+
+
+async def event_stream(*channels: str):
+    with broker.subscribe(*channels) as queue:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                async with asyncio.timeout(SSE_KEEPALIVE):
+                    message = await queue.get()
+            except TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if message is _CLOSED:
+                return
+            yield message
@@ -0,0 +1,138 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from jinja2 import Template
+from sqlalchemy import event
+
+logger = logging.getLogger("bookmind.requests")
+
+_current: ContextVar = ContextVar("request_timings", default=None)
+_PARAM_LIST = re.compile(r"\(\s*\$\d+(?:\s*,\s*\$\d+)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement = None
+        self.shapes = Counter()
+        self.sections = {}
+
+    def add_section(self, name, elapsed_ms):
+        self.sections[name] = self.sections.get(name, 0.0) + elapsed_ms
+
+    def repeated(self, threshold):
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+    def server_timing(self):
+        parts = [f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"']
+        parts += [f"{name};dur={elapsed:.1f}" for name, elapsed in self.sections.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def statement_shape(statement: str) -> str:
+    return _PARAM_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+@contextmanager
+def timed(name: str):
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add_section(name, (time.perf_counter() - started) * 1000)
+
+
+class TimedTemplate(Template):
+    def render(self, *args, **kwargs):
+        with timed("render"):
+            return super().render(*args, **kwargs)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None and context is not None:
+        context.request_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = _current.get()
+    started = getattr(context, "request_query_started", None)
+    if timings is None or started is None:
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    timings.queries += 1
+    timings.db_ms += elapsed_ms
+    timings.shapes[statement_shape(statement)] += 1
+    if elapsed_ms > timings.slowest_ms:
+        timings.slowest_ms = elapsed_ms
+        timings.slowest_statement = statement[:500]
+
+
+class InstrumentationMiddleware:
+    def __init__(self, app, n1_threshold: int = 5):
+        self.app = app
+        self.n1_threshold = n1_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        status = None
+
+        async def send_with_timings(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            _current.reset(token)
+            self._log(scope, status, timings)
+
+    def _log(self, scope, status, timings):
+        repeated = timings.repeated(self.n1_threshold)
+        record = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status,
+            "total_ms": round((time.perf_counter() - timings.started) * 1000, 3),
+            "queries": timings.queries,
+            "db_ms": round(timings.db_ms, 3),
+            "sections": {name: round(elapsed, 3) for name, elapsed in timings.sections.items()},
+            "slowest_ms": round(timings.slowest_ms, 3),
+            "slowest_statement": timings.slowest_statement,
+        }
+        if repeated:
+            record["n_plus_one"] = [{"statement": shape[:500], "count": count} for shape, count in repeated]
+            logger.warning(json.dumps(record, ensure_ascii=False))
+        else:
+            logger.info(json.dumps(record, ensure_ascii=False))
+
+
+def instrument_requests(app, engines, template_env, n1_threshold: int = 5):
+    for engine in engines:
+        event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    template_env.template_class = TimedTemplate
+    app.add_middleware(InstrumentationMiddleware, n1_threshold=n1_threshold)
@@ -0,0 +1,327 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from sqlalchemy import select, update, delete, func, insert, case, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import crud, timeline
+from .books import get_or_create_book, refresh_book_stats
+from .covers import proxy_cover_url
+from .config import (
+    DEFAULT_COVER_URL, JOB_WORKERS, JOB_MAX_ATTEMPTS, JOB_RETRY_DELAY, JOB_RETRY_MAX_DELAY,
+    JOBS_DURABLE, JOB_POLL_INTERVAL, JOB_LEASE_SECONDS, JOB_SHUTDOWN_TIMEOUT,
+)
+from .database import async_session
+from .models import Book, Job, Review
+from .bus import bus
+from .utils import fetch_book_info
+
+logger = logging.getLogger("bookmind.jobs")
+
+
+class _Stats:
+    def __init__(self):
+        self.enqueued = 0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+        self.running = 0
+        self.run_time_total = 0.0
+
+
+class JobQueue:
+    def __init__(self, workers: int, durable: bool):
+        self.workers = workers
+        self.durable = durable
+        self.stats = _Stats()
+        self._handlers = {}
+        self._queue = None
+        self._pending = set()
+        self._delayed = set()
+        self._wakeup = None
+        self._stopping = False
+        self._tasks = []
+
+    def handler(self, name: str):
+        def register(func):
+            self._handlers[name] = func
+            return func
+        return register
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        worker = self._durable_worker if self.durable else self._memory_worker
+        self._tasks = [asyncio.create_task(worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        if not self.durable and self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), JOB_SHUTDOWN_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("job queue stopped with %d jobs left", self._queue.qsize())
+        if self.durable and self._tasks:
+            self._stopping = True
+            self._wakeup.set()
+            _, running = await asyncio.wait(self._tasks, timeout=JOB_SHUTDOWN_TIMEOUT)
+            if running:
+                logger.warning("job queue stopped with %d jobs still running", len(running))
+        for task in [*self._tasks, *self._delayed]:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._delayed, return_exceptions=True)
+        self._tasks = []
+        self._delayed = set()
+
+    async def enqueue(self, name: str, db: AsyncSession | None = None, **payload):
+        await self.enqueue_all([(name, payload)], db)
+
+    async def enqueue_all(self, jobs: list[tuple[str, dict]], db: AsyncSession | None = None):
+        for name, _ in jobs:
+            if name not in self._handlers:
+                raise ValueError(f"Unknown job: {name}")
+        if not jobs:
+            return
+        if db is not None:
+            if self.durable:
+                await db.execute(insert(Job), [{"name": name, "payload": payload} for name, payload in jobs])
+            db.info.setdefault("jobs", []).extend(jobs)
+            return
+        if self.durable:
+            async with async_session() as own:
+                await own.execute(insert(Job), [{"name": name, "payload": payload} for name, payload in jobs])
+                await own.commit()
+        self._dispatch(jobs)
+
+    def _dispatch(self, jobs: list[tuple[str, dict]]):
+        if self.durable:
+            self.stats.enqueued += len(jobs)
+            if self._wakeup is not None:
+                self._wakeup.set()
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        for name, payload in jobs:
+            key = (name, tuple(sorted(payload.items())))
+            if key in self._pending:
+                continue
+            self._pending.add(key)
+            self.stats.enqueued += 1
+            self._queue.put_nowait((name, payload, 1))
+
+    async def depth(self) -> int:
+        if not self.durable:
+            return (self._queue.qsize() if self._queue else 0) + len(self._delayed)
+        async with async_session() as db:
+            return (await db.execute(select(func.count(Job.id)).where(Job.failed_at.is_(None)))).scalar_one()
+
+    async def snapshot(self) -> dict:
+        return {
+            "backend": "database" if self.durable else "memory",
+            "workers": len(self._tasks),
+            "depth": await self.depth(),
+            "running": self.stats.running,
+            "enqueued": self.stats.enqueued,
+            "completed": self.stats.completed,
+            "retried": self.stats.retried,
+            "failed": self.stats.failed,
+            "run_avg_ms": round(self.stats.run_time_total / self.stats.completed * 1000, 3) if self.stats.completed else 0,
+        }
+
+    def _retry_delay(self, attempt: int) -> float:
+        return min(JOB_RETRY_DELAY * 2 ** (attempt - 1), JOB_RETRY_MAX_DELAY)
+
+    async def _run(self, name: str, payload: dict) -> str | None:
+        if name not in self._handlers:
+            return f"Unknown job: {name}"
+        self.stats.running += 1
+        started = time.perf_counter()
+        try:
+            await self._handlers[name](**payload)
+        except Exception as e:
+            logger.exception("job %s %r failed", name, payload)
+            return repr(e)
+        else:
+            self.stats.completed += 1
+            self.stats.run_time_total += time.perf_counter() - started
+            return None
+        finally:
+            self.stats.running -= 1
+
+    async def _memory_worker(self):
+        while True:
+            name, payload, attempt = await self._queue.get()
+            try:
+                self._pending.discard((name, tuple(sorted(payload.items()))))
+                if await self._run(name, payload) is None:
+                    continue
+                if attempt >= JOB_MAX_ATTEMPTS:
+                    self.stats.failed += 1
+                    continue
+                self.stats.retried += 1
+                retry = asyncio.create_task(self._requeue(name, payload, attempt))
+                self._delayed.add(retry)
+                retry.add_done_callback(self._delayed.discard)
+            finally:
+                self._queue.task_done()
+
+    async def _requeue(self, name: str, payload: dict, attempt: int):
+        await asyncio.sleep(self._retry_delay(attempt))
+        self._queue.put_nowait((name, payload, attempt + 1))
+
+    async def _claim(self):
+        async with async_session() as db:
+            next_job = (
+                select(Job.id)
+                .where(Job.failed_at.is_(None), Job.run_at <= func.now())
+                .order_by(Job.run_at, Job.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+                .scalar_subquery()
+            )
+            row = (await db.execute(
+                update(Job)
+                .where(Job.id == next_job)
+                .values(attempts=Job.attempts + 1, run_at=func.now() + timedelta(seconds=JOB_LEASE_SECONDS))
+                .returning(Job.id, Job.name, Job.payload, Job.attempts)
+            )).first()
+            await db.commit()
+            return row
+
+    async def _finish(self, job, error: str | None):
+        async with async_session() as db:
+            if error is None:
+                await db.execute(delete(Job).where(Job.id == job.id))
+            elif job.attempts >= JOB_MAX_ATTEMPTS or job.name not in self._handlers:
+                self.stats.failed += 1
+                await db.execute(update(Job).where(Job.id == job.id).values(failed_at=func.now(), last_error=error))
+            else:
+                self.stats.retried += 1
+                delay = timedelta(seconds=self._retry_delay(job.attempts))
+                await db.execute(update(Job).where(Job.id == job.id).values(run_at=func.now() + delay, last_error=error))
+            await db.commit()
+
+    async def _durable_worker(self):
+        while not self._stopping:
+            try:
+                job = await self._claim()
+            except Exception:
+                logger.exception("could not claim a job")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                if self._stopping:
+                    return
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            error = await self._run(job.name, job.payload)
+            try:
+                await self._finish(job, error)
+            except Exception:
+                logger.exception("could not finish job %s", job.id)
+
+
+job_queue = JobQueue(JOB_WORKERS, JOBS_DURABLE)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_committed_jobs(session):
+    jobs = session.info.pop("jobs", None)
+    if jobs:
+        job_queue._dispatch(jobs)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back_jobs(session):
+    session.info.pop("jobs", None)
+
+
+@job_queue.handler("sync_review_book")
+async def sync_review_book(review_id: int):
+    async with async_session() as db:
+        review = (await db.execute(
+            select(Review.book_title, Review.author, Review.cover_url, Review.book_id).where(Review.id == review_id)
+        )).first()
+        if review is None:
+            return
+        book_id = await get_or_create_book(db, review.book_title, review.author, review.cover_url)
+        if book_id != review.book_id:
+            await db.execute(update(Review).where(Review.id == review_id).values(book_id=book_id))
+            await refresh_book_stats(db, review.book_id)
+        await refresh_book_stats(db, book_id)
+        await db.commit()
+    bus.publish("pages", tags=["top"])
+
+
+@job_queue.handler("refresh_user_stats")
+async def refresh_user_stats(user_id: int):
+    async with async_session() as db:
+        await crud.refresh_user_stats(db, user_id)
+        await db.commit()
+    bus.publish("pages", tags=[f"user:{user_id}"])
+
+
+@job_queue.handler("enrich_review")
+async def enrich_review(review_id: int):
+    async with async_session() as db:
+        review = (await db.execute(
+            select(Review.book_title, Review.cover_url, Review.description, Review.user_id, Review.book_id)
+            .where(Review.id == review_id)
+        )).first()
+    if review is None or (review.cover_url != DEFAULT_COVER_URL and review.description):
+        return
+    info = await fetch_book_info(review.book_title, raise_on_error=True)
+    if not info:
+        return
+    description = None if review.description else info["description"]
+    cover_source = info["cover_url"] if review.cover_url == DEFAULT_COVER_URL else None
+    if not description and not cover_source:
+        return
+    async with async_session() as db:
+        values = {}
+        if description:
+            values["description"] = case(
+                (func.coalesce(Review.description, "") == "", description), else_=Review.description
+            )
+        if cover_source:
+            cover_url = await proxy_cover_url(db, cover_source)
+            values["cover_url"] = case((Review.cover_url == DEFAULT_COVER_URL, cover_url), else_=Review.cover_url)
+        await db.execute(update(Review).where(Review.id == review_id).values(**values))
+        if cover_source and review.book_id is not None:
+            await db.execute(
+                update(Book)
+                .where(Book.id == review.book_id, Book.cover_url.is_(None) | (Book.cover_url == DEFAULT_COVER_URL))
+                .values(cover_url=cover_url)
+            )
+        await db.commit()
+    bus.publish("pages", tags=["feed", "top", f"review:{review_id}", f"user:{review.user_id}"])
+
+
+@job_queue.handler("fanout_review")
+async def fanout_review(review_id: int):
+    async with async_session() as db:
+        await timeline.fanout_review(db, review_id)
+
+
+@job_queue.handler("retract_review")
+async def retract_review(review_id: int):
+    async with async_session() as db:
+        await timeline.retract_review(db, review_id)
+
+
+@job_queue.handler("backfill_timeline")
+async def backfill_timeline(follower_id: int, followee_id: int):
+    async with async_session() as db:
+        await timeline.backfill_timeline(db, follower_id, followee_id)
+
+
+@job_queue.handler("retract_author")
+async def retract_author(follower_id: int, followee_id: int):
+    async with async_session() as db:
+        await timeline.retract_author(db, follower_id, followee_id)
@@ -1,28 +1,61 @@
-from fastapi import FastAPI, Request, Depends, Form, HTTPException, Response
-from fastapi.responses import HTMLResponse, RedirectResponse
+import csv
+import hmac
+import io
+
+from fastapi import FastAPI, Request, Depends, Form, HTTPException, Response, UploadFile, File
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse, JSONResponse, FileResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from sqlalchemy import func, desc
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload
 from jose import JWTError, jwt
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
-from .database import get_db, engine, Base
-from .models import Review, User, Comment, Like
-from .utils import fetch_book_info
-from .auth_utils import hash_password, verify_password, create_access_token
-from .config import JWT_SECRET, ALGORITHM
+from .database import get_db, engine, replica_engines, async_session, SAFE_METHODS
+from .models import Review, User, Book
+from .cache import MISSING
+from .utils import fetch_book_info, warm_book_cache, close_http_client
+from .pagination import keyset_page, split_page
+from . import crud, bulk, api
+from .search import search_reviews
+from .recommend import recommended_reviews
+from .timeline import following_timeline
+from .metrics import pool_snapshot, query_snapshot
+from .page_cache import page_cache
+from .jobs import job_queue
+from .events import broker, event_stream
+from .bus import bus
+from .covers import (
+    cover_cache, cover_src, is_cover_hash, proxy_cover_url, CoverFetchError, COVER_CACHE_HEADERS, PLACEHOLDER_SVG
+)
+from .instrumentation import instrument_requests
+from .compression import CompressionMiddleware
+from .startup import startup_report, template_bytecode_cache, warm_templates, check_schema
+from .auth_utils import hash_password, verify_password, needs_rehash, create_user_token, CurrentUser, user_cache
+from .config import (
+    JWT_SECRET, ALGORITHM, FEED_PAGE_SIZE, COMMENTS_PAGE_SIZE, DEFAULT_COVER_URL,
+    INSTRUMENTATION_ENABLED, N1_THRESHOLD, COVER_SIZES, COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE,
+    GZIP_LEVEL, BROTLI_QUALITY, SCHEMA_CHECK, TEMPLATE_WARMUP, METRICS_TOKEN,
+)
 from pydantic import ValidationError
 from .schemas import UserCreate, ReviewCreate
 
 app = FastAPI(title="BookMind")
 app.add_middleware(SessionMiddleware, secret_key=JWT_SECRET)
-templates = Jinja2Templates(directory="app/templates")
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY
+    )
+app.include_router(api.router)
+templates = Jinja2Templates(directory="app/templates", bytecode_cache=template_bytecode_cache())
+if INSTRUMENTATION_ENABLED:
+    instrument_requests(app, [engine, *replica_engines], templates.env, N1_THRESHOLD)
 
 @app.exception_handler(StarletteHTTPException)
 async def custom_http_exception_handler(request: Request, exc: StarletteHTTPException):
+    if request.url.path.startswith(api.router.prefix + "/"):
+        return JSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=exc.headers)
     if exc.status_code == 404:
         return templates.TemplateResponse(
             "404.html", 
@@ -36,10 +69,14 @@ def flash(request: Request, message: str, category: str = "success"):
         request.session["flash_messages"] = []
     request.session["flash_messages"].append({"message": message, "category": category})
 
+def wants_json(request: Request) -> bool:
+    return "application/json" in request.headers.get("accept", "")
+
 def get_flashed_messages(request: Request):
     return request.session.pop("flash_messages", [])
 
 templates.env.globals.update(get_flashed_messages=get_flashed_messages)
+templates.env.filters["cover"] = cover_src
 
 async def get_current_user(request: Request, db: AsyncSession = Depends(get_db)):
     token = request.cookies.get("access_token")
@@ -47,66 +84,199 @@ async def get_current_user(request: Request, db: AsyncSession = Depends(get_db))
         return None
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            return None
-    except JWTError:
+        user_id = int(payload.get("sub"))
+    except (JWTError, TypeError, ValueError):
         return None
-    
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    return result.scalar_one_or_none()
+
+    cached = user_cache.get(user_id)
+    if cached is not MISSING:
+        return cached
+    username = payload.get("name")
+    if username and request.method in SAFE_METHODS:
+        return CurrentUser(id=user_id, username=username)
+
+    result = await db.execute(select(User.id, User.username).where(User.id == user_id))
+    row = result.first()
+    current_user = CurrentUser(id=row.id, username=row.username) if row else None
+    user_cache.set(user_id, current_user)
+    return current_user
 
 @app.on_event("startup")
 async def startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    with startup_report.measure() as report:
+        if SCHEMA_CHECK:
+            with report.phase("schema_check"):
+                await check_schema(engine)
+        if TEMPLATE_WARMUP:
+            with report.phase("templates"):
+                warm_templates(templates.env)
+        with report.phase("book_cache"):
+            await warm_book_cache()
+        with report.phase("job_queue"):
+            await job_queue.start()
+        with report.phase("invalidation_bus"):
+            await bus.start()
+        cover_cache.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await job_queue.stop()
+    await bus.stop()
+    await cover_cache.stop()
+    await close_http_client()
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root(
     request: Request, 
+    before: str | None = None,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: CurrentUser = Depends(get_current_user)
 ):
-    query = select(Review).order_by(Review.created_at.desc()).options(
-        selectinload(Review.owner),
-        selectinload(Review.likes)
+    cached = page_cache.get(request, user)
+    if cached:
+        return cached
+    query = keyset_page(
+        select(Review).options(joinedload(Review.owner)),
+        Review.created_at, Review.id, before, FEED_PAGE_SIZE
     )
     result = await db.execute(query)
-    reviews = result.scalars().all()
-    return templates.TemplateResponse("index.html", {
+    reviews, next_cursor = split_page(result.scalars().all(), FEED_PAGE_SIZE)
+
+    liked_ids = await crud.liked_review_ids(db, user, [review.id for review in reviews])
+
+    response = templates.TemplateResponse("index.html", {
         "request": request, 
         "title": "Лента", 
         "reviews": reviews,
+        "liked_ids": liked_ids,
+        "next_cursor": next_cursor,
         "user": user
     })
+    return page_cache.store(request, user, response, ["feed", *(f"review:{review.id}" for review in reviews)])
        
 @app.get("/top", response_class=HTMLResponse)
 async def read_top_books(
     request: Request, 
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: CurrentUser = Depends(get_current_user)
 ):
+    cached = page_cache.get(request, user)
+    if cached:
+        return cached
     query = (
-        select(
-            Review.book_title,
-            Review.author,
-            Review.cover_url,
-            func.count(Review.id).label("review_count")
-        )
-        .group_by(Review.book_title, Review.author, Review.cover_url)
-        .order_by(desc("review_count"))
+        select(Book)
+        .where(Book.review_count > 0)
+        .order_by(Book.review_count.desc(), Book.id.desc())
         .limit(20)
     )
     
     result = await db.execute(query)
-    top_books = result.all() 
+    top_books = result.scalars().all()
     
-    return templates.TemplateResponse("top.html", {
+    response = templates.TemplateResponse("top.html", {
         "request": request, 
         "title": "Топ книг", 
         "top_books": top_books,
         "user": user
-    })  
+    })
+    return page_cache.store(request, user, response, ["top"])
+
+@app.get("/for-you", response_class=HTMLResponse)
+async def read_for_you(
+    request: Request,
+    after: str | None = None,
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
+):
+    if not user:
+        return RedirectResponse(url="/login", status_code=303)
+    results, next_cursor = await recommended_reviews(db, user.id, after, FEED_PAGE_SIZE)
+    return templates.TemplateResponse("for_you.html", {
+        "request": request,
+        "title": "Для вас",
+        "results": results,
+        "next_cursor": next_cursor,
+        "user": user
+    })
+
+@app.get("/following", response_class=HTMLResponse)
+async def read_following(
+    request: Request,
+    before: str | None = None,
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
+):
+    if not user:
+        return RedirectResponse(url="/login", status_code=303)
+    reviews, next_cursor = await following_timeline(db, user.id, before, FEED_PAGE_SIZE)
+    liked_ids = await crud.liked_review_ids(db, user, [review.id for review in reviews])
+    return templates.TemplateResponse("following.html", {
+        "request": request,
+        "title": "Подписки",
+        "reviews": reviews,
+        "liked_ids": liked_ids,
+        "next_cursor": next_cursor,
+        "user": user
+    })
+
+@app.get("/reviews/search", response_class=HTMLResponse)
+async def search_reviews_page(
+    request: Request,
+    q: str = "",
+    after: str | None = None,
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
+):
+    q = q.strip()[:200]
+    results, next_cursor = [], None
+    if q:
+        results, next_cursor = await search_reviews(db, q, after, FEED_PAGE_SIZE)
+    return templates.TemplateResponse("search.html", {
+        "request": request,
+        "title": "Поиск",
+        "q": q,
+        "results": results,
+        "next_cursor": next_cursor,
+        "user": user
+    })
+
+def metrics_allowed(request: Request) -> bool:
+    if METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode())
+    return request.client is not None and request.client.host in ("127.0.0.1", "::1")
+
+@app.get("/metrics")
+async def read_metrics(request: Request):
+    if not metrics_allowed(request):
+        raise HTTPException(status_code=404, detail="Not found")
+    return {
+        "pool": pool_snapshot(engine),
+        "replica_pools": [pool_snapshot(replica) for replica in replica_engines],
+        "queries": query_snapshot(),
+        "jobs": await job_queue.snapshot(),
+        "events": broker.snapshot(),
+        "covers": cover_cache.snapshot(),
+        "startup": startup_report.snapshot(),
+        "invalidation_bus": bus.snapshot(),
+    }
+
+@app.get("/covers/placeholder.svg")
+async def read_cover_placeholder():
+    return Response(PLACEHOLDER_SVG, media_type="image/svg+xml", headers=COVER_CACHE_HEADERS)
+
+@app.get("/covers/{cover_hash}")
+async def read_cover(cover_hash: str, size: str = "feed", db: AsyncSession = Depends(get_db)):
+    if not is_cover_hash(cover_hash) or size not in COVER_SIZES:
+        raise HTTPException(status_code=404, detail="Cover not found")
+    try:
+        found = await cover_cache.get(db, cover_hash, size)
+    except CoverFetchError:
+        return RedirectResponse(url=DEFAULT_COVER_URL, status_code=302, headers={"Cache-Control": "public, max-age=300"})
+    if found is None:
+        raise HTTPException(status_code=404, detail="Cover not found")
+    path, stat, media_type = found
+    return FileResponse(path, stat_result=stat, media_type=media_type, headers=COVER_CACHE_HEADERS)
 
 @app.get("/search")
 async def search_book(title: str):
@@ -116,7 +286,7 @@ async def search_book(title: str):
     return book_data if book_data else {"error": "Книга не найдена"}
 
 @app.get("/register", response_class=HTMLResponse)
-async def register_page(request: Request, user: User = Depends(get_current_user)):
+async def register_page(request: Request, user: CurrentUser = Depends(get_current_user)):
     return templates.TemplateResponse("register.html", {"request": request, "title": "Регистрация", "user": user})
 
 @app.post("/register")
@@ -140,7 +310,7 @@ async def register_user(
         flash(request, f"ОШИБКА: {error_msg}", "error")
         return RedirectResponse(url="/register", status_code=303)
 
-    hashed_pw = hash_password(user_data.password)
+    hashed_pw = await hash_password(user_data.password)
     new_user = User(username=user_data.username, email=user_data.email, hashed_password=hashed_pw)
     
     try:
@@ -155,7 +325,7 @@ async def register_user(
     return RedirectResponse(url="/login", status_code=303)
 
 @app.get("/login", response_class=HTMLResponse)
-async def login_page(request: Request, user: User = Depends(get_current_user)):
+async def login_page(request: Request, user: CurrentUser = Depends(get_current_user)):
     return templates.TemplateResponse("login.html", {"request": request, "title": "Вход", "user": user})
 
 @app.post("/login")
@@ -170,25 +340,39 @@ async def login(
     result = await db.execute(query)
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(password, user.hashed_password):
+    if not user or not await verify_password(password, user.hashed_password):
         flash(request, "Неверный никнейм или пароль", "error")
         return RedirectResponse(url="/login", status_code=303)
+
+    if needs_rehash(user.hashed_password):
+        user.hashed_password = await hash_password(password)
+        await db.commit()
+    bus.publish("user", user_id=user.id)
+    user_cache.set(user.id, CurrentUser(id=user.id, username=user.username))
     
-    access_token = create_access_token(data={"sub": str(user.id)})
+    access_token = create_user_token(user)
     resp = RedirectResponse(url="/", status_code=303)
     resp.set_cookie(key="access_token", value=access_token, httponly=True)
     flash(request, f"С возвращением, {user.username}!", "success")
     return resp
 
 @app.get("/logout")
-async def logout(request: Request):
+async def logout(request: Request, user: CurrentUser = Depends(get_current_user)):
+    if user:
+        bus.publish("user", user_id=user.id)
     resp = RedirectResponse(url="/", status_code=303)
     resp.delete_cookie("access_token")
     flash(request, "Вы успешно вышли из системы", "success")
     return resp
 
+def review_jobs(review_id: int, user_id: int, cover_url: str | None, description: str | None) -> list:
+    jobs = [("sync_review_book", {"review_id": review_id}), ("refresh_user_stats", {"user_id": user_id})]
+    if cover_url == DEFAULT_COVER_URL or not description:
+        jobs.append(("enrich_review", {"review_id": review_id}))
+    return jobs
+
 @app.get("/add", response_class=HTMLResponse)
-async def add_review_page(request: Request, user: User = Depends(get_current_user)):
+async def add_review_page(request: Request, user: CurrentUser = Depends(get_current_user)):
     if not user:
         return RedirectResponse(url="/login")
     return templates.TemplateResponse("add_review.html", {"request": request, "title": "Новая мысль", "user": user})
@@ -197,7 +381,7 @@ async def add_review_page(request: Request, user: User = Depends(get_current_use
 async def create_review(
     request: Request,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
     book_title: str = Form(...),
     author: str = Form(...),
     rating: int = Form(...),
@@ -211,7 +395,7 @@ async def create_review(
         return RedirectResponse(url="/login", status_code=303)
         
     if not cover_url:
-        cover_url = "https://placehold.co/400x600/18181b/ffffff?text=NO+COVER"
+        cover_url = DEFAULT_COVER_URL
 
     try:
         review_data = ReviewCreate(
@@ -238,44 +422,109 @@ async def create_review(
         rating=review_data.rating,
         text=review_data.text,
         description=review_data.description,
-        cover_url=review_data.cover_url,
+        cover_url=await proxy_cover_url(db, review_data.cover_url),
         status=review_data.status,
         user_id=user.id
     )
     db.add(new_review)
+    await db.flush()
+    await job_queue.enqueue_all([
+        *review_jobs(new_review.id, user.id, new_review.cover_url, new_review.description),
+        ("fanout_review", {"review_id": new_review.id}),
+    ], db)
     await db.commit()
+    bus.publish("review_created", review_id=new_review.id, user_id=user.id)
     flash(request, "НОВАЯ ЗАПИСЬ ОПУБЛИКОВАНА", "success")
     return RedirectResponse(url="/", status_code=303)
 
+@app.post("/import")
+async def import_reviews(
+    request: Request,
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
+):
+    if not user:
+        flash(request, "СНАЧАЛА ВОЙДИТЕ В АККАУНТ", "error")
+        return RedirectResponse(url="/login", status_code=303)
+    fmt = "jsonl" if (file.filename or "").lower().endswith((".jsonl", ".json")) else "csv"
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        result = await bulk.import_reviews(db, user.id, bulk.read_rows(stream, fmt))
+    except (UnicodeDecodeError, csv.Error):
+        flash(request, "ОШИБКА: НЕ УДАЛОСЬ ПРОЧИТАТЬ ФАЙЛ", "error")
+        return RedirectResponse(url="/profile", status_code=303)
+    finally:
+        stream.detach()
+    if result.imported:
+        bus.publish("pages", tags=["feed", "top", f"user:{user.id}"])
+    flash(request, f"ИМПОРТИРОВАНО: {result.imported}, ПРОПУЩЕНО: {result.skipped}", "success" if result.imported else "error")
+    return RedirectResponse(url="/profile", status_code=303)
+
+async def _export_stream(user_id: int, fmt: str):
+    async with async_session() as db:
+        async for chunk in bulk.export_reviews(db, user_id, fmt):
+            yield chunk
+
+@app.get("/export")
+async def export_reviews(request: Request, format: str = "jsonl", user: CurrentUser = Depends(get_current_user)):
+    if not user:
+        return RedirectResponse(url="/login", status_code=303)
+    if format not in ("csv", "jsonl"):
+        raise HTTPException(status_code=400, detail="Unsupported format")
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_stream(user.id, format),
+        media_type=f"{media_type}; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="bookmind-{user.username}.{format}"'}
+    )
+
 @app.get("/review/{review_id}", response_class=HTMLResponse)
 async def read_review(
     review_id: int, 
     request: Request, 
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: CurrentUser = Depends(get_current_user)
 ):
-    query = select(Review).where(Review.id == review_id).options(
-        selectinload(Review.owner),
-        selectinload(Review.comments).selectinload(Comment.user),
-        selectinload(Review.likes)
-    )
+    query = select(Review).where(Review.id == review_id).options(joinedload(Review.owner))
     result = await db.execute(query)
     review = result.scalar_one_or_none()
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
+    liked_ids = await crud.liked_review_ids(db, user, [review.id])
+    comments, next_cursor = await crud.comment_page(db, review_id, None, COMMENTS_PAGE_SIZE)
     return templates.TemplateResponse("review_detail.html", {
         "request": request, 
         "review": review, 
+        "review_id": review.id,
+        "liked_ids": liked_ids,
+        "comments": comments,
+        "next_cursor": next_cursor,
         "title": review.book_title,
         "user": user
     })
 
+@app.get("/review/{review_id}/comments", response_class=HTMLResponse)
+async def read_comments(
+    review_id: int,
+    request: Request,
+    after: str | None = None,
+    db: AsyncSession = Depends(get_db)
+):
+    comments, next_cursor = await crud.comment_page(db, review_id, after, COMMENTS_PAGE_SIZE)
+    return templates.TemplateResponse("_comments.html", {
+        "request": request,
+        "review_id": review_id,
+        "comments": comments,
+        "next_cursor": next_cursor
+    })
+
 @app.get("/review/{review_id}/edit", response_class=HTMLResponse)
 async def edit_review_page(
     review_id: int, 
     request: Request, 
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: CurrentUser = Depends(get_current_user)
 ):
     if not user:
         return RedirectResponse(url="/login")
@@ -298,7 +547,7 @@ async def update_review(
     review_id: int,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
     book_title: str = Form(...),
     author: str = Form(...),
     rating: int = Form(...),
@@ -317,7 +566,7 @@ async def update_review(
     if review.user_id != user.id:
         raise HTTPException(status_code=403, detail="Not your review")
     if not cover_url:
-        cover_url = "https://placehold.co/400x600/18181b/ffffff?text=NO+COVER"
+        cover_url = DEFAULT_COVER_URL
 
     try:
         review_data = ReviewCreate(
@@ -343,9 +592,11 @@ async def update_review(
     review.rating = review_data.rating
     review.text = review_data.text
     review.description = review_data.description
-    review.cover_url = review_data.cover_url
+    review.cover_url = await proxy_cover_url(db, review_data.cover_url)
     review.status = review_data.status
+    await job_queue.enqueue_all(review_jobs(review_id, user.id, review.cover_url, review.description), db)
     await db.commit()
+    bus.publish("review_updated", review_id=review_id, user_id=user.id)
     return RedirectResponse(url=f"/review/{review_id}", status_code=303)
 
 @app.post("/review/{review_id}/delete")
@@ -353,7 +604,7 @@ async def delete_review(
     review_id: int,
     request: Request, 
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: CurrentUser = Depends(get_current_user)
 ):
     if not user:
         raise HTTPException(status_code=401, detail="Log in first")
@@ -364,8 +615,9 @@ async def delete_review(
         raise HTTPException(status_code=404, detail="Review not found")
     if review.user_id != user.id:
         raise HTTPException(status_code=403, detail="Not your review")
-    await db.delete(review)
-    await db.commit()
+    await job_queue.enqueue("retract_review", db, review_id=review_id)
+    await crud.delete_review(db, review)
+    bus.publish("review_deleted", review_id=review_id, user_id=user.id)
     flash(request, "Запись удалена навсегда", "success")
     return RedirectResponse(url="/", status_code=303)
 
@@ -375,19 +627,27 @@ async def add_comment(
     request: Request,
     text: str = Form(...),
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: CurrentUser = Depends(get_current_user)
 ):
     if not user:
+        if wants_json(request):
+            return JSONResponse({"error": "login required", "login_url": "/login"}, status_code=401)
         flash(request, "ВОЙДИТЕ, ЧТОБЫ ОСТАВИТЬ КОММЕНТАРИЙ", "error")
         return RedirectResponse(url="/login", status_code=303)
-    query = select(Review).where(Review.id == review_id)
-    result = await db.execute(query)
-    review = result.scalar_one_or_none()
-    if not review:
+    added = await crud.add_comment(db, user.id, review_id, text)
+    if not added:
         raise HTTPException(status_code=404, detail="Review not found")
-    new_comment = Comment(text=text, user_id=user.id, review_id=review_id)
-    db.add(new_comment)
-    await db.commit()
+    bus.publish("comment_added", review_id=review_id)
+    comment = {"id": added.comment.id, "username": user.username, "text": added.comment.text, "created_at": added.comment.created_at}
+    event = {
+        "review_id": review_id,
+        "comment_id": added.comment.id,
+        "comment_count": added.comment_count,
+        "html": templates.get_template("_comment.html").render(comment=comment),
+    }
+    broker.publish(f"review:{review_id}", "comment", event)
+    if wants_json(request):
+        return JSONResponse(event, status_code=201)
     flash(request, "КОММЕНТАРИЙ ОПУБЛИКОВАН", "success")
     return RedirectResponse(url=f"/review/{review_id}", status_code=303)
 
@@ -396,47 +656,65 @@ async def toggle_like(
     review_id: int,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: CurrentUser = Depends(get_current_user)
 ):
     if not user:
+        if wants_json(request):
+            return JSONResponse({"error": "login required", "login_url": "/login"}, status_code=401)
         flash(request, "ВОЙДИТЕ, ЧТОБЫ ОЦЕНИТЬ ЗАПИСЬ", "error")
         return RedirectResponse(url="/login", status_code=303)
-    query_review = select(Review).where(Review.id == review_id)
-    result_review = await db.execute(query_review)
-    if not result_review.scalar_one_or_none():
+    toggled = await crud.toggle_like(db, user.id, review_id)
+    if toggled is None:
         raise HTTPException(status_code=404, detail="Review not found")
-    query_like = select(Like).where(Like.user_id == user.id, Like.review_id == review_id)
-    result_like = await db.execute(query_like)
-    existing_like = result_like.scalar_one_or_none()
-    if existing_like:
-        await db.delete(existing_like)
-    else:
-        new_like = Like(user_id=user.id, review_id=review_id)
-        db.add(new_like)
-    await db.commit()
+    bus.publish("like_toggled", review_id=review_id, owner_id=toggled.owner_id)
+    event = {"review_id": review_id, "like_count": toggled.like_count}
+    broker.publish(f"review:{review_id}", "like", event)
+    broker.publish("feed", "like", event)
+    if wants_json(request):
+        return JSONResponse({**event, "liked": toggled.liked})
     referer = request.headers.get("referer")
     redirect_url = referer if referer else f"/review/{review_id}"
     return RedirectResponse(url=redirect_url, status_code=303)
 
+def _sse_response(*channels: str):
+    return StreamingResponse(
+        event_stream(*channels),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/review/{review_id}/events")
+async def review_events(review_id: int):
+    return _sse_response(f"review:{review_id}")
+
+@app.get("/events")
+async def feed_events():
+    return _sse_response("feed")
+
 @app.get("/profile", response_class=HTMLResponse)
 async def read_my_profile(
     request: Request, 
+    before: str | None = None,
     db: AsyncSession = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: CurrentUser = Depends(get_current_user)
 ):
     if not user:
         return RedirectResponse(url="/login", status_code=303)
-    query = select(Review).where(Review.user_id == user.id).order_by(Review.created_at.desc()).options(
-        selectinload(Review.owner),
-        selectinload(Review.likes)
-    )
-    result = await db.execute(query)
-    my_reviews = result.scalars().all()
+    profile_user = await db.get(User, user.id)
+    if not profile_user:
+        bus.publish("user", user_id=user.id)
+        user_cache.set(user.id, None)
+        return RedirectResponse(url="/login", status_code=303)
+    my_reviews, next_cursor = await crud.profile_reviews(db, user.id, before, FEED_PAGE_SIZE)
+    liked_ids = await crud.liked_review_ids(db, user, [review.id for review in my_reviews])
     return templates.TemplateResponse("profile.html", {
         "request": request, 
         "user": user, 
-        "profile_user": user,
+        "profile_user": profile_user,
         "reviews": my_reviews,
+        "liked_ids": liked_ids,
+        "next_cursor": next_cursor,
+        "page_url": "/profile",
         "title": "Мой профиль",
         "is_own_profile": True
     })
@@ -445,23 +723,57 @@ async def read_my_profile(
 async def read_public_profile(
     username: str,
     request: Request,
+    before: str | None = None,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    query = select(User).where(User.username == username).options(
-        selectinload(User.reviews).selectinload(Review.likes),
-        selectinload(User.reviews).selectinload(Review.owner)
-    )
-    result = await db.execute(query)
+    cached = page_cache.get(request, current_user)
+    if cached:
+        return cached
+    result = await db.execute(select(User).where(User.username == username))
     profile_user = result.scalar_one_or_none()
     if not profile_user:
         raise HTTPException(status_code=404, detail="User not found")
-    reviews = sorted(profile_user.reviews, key=lambda r: r.created_at, reverse=True)
-    return templates.TemplateResponse("profile.html", {
+    reviews, next_cursor = await crud.profile_reviews(db, profile_user.id, before, FEED_PAGE_SIZE)
+    liked_ids = await crud.liked_review_ids(db, current_user, [review.id for review in reviews])
+    is_following = await crud.is_following(db, current_user, profile_user.id)
+    response = templates.TemplateResponse("profile.html", {
         "request": request,
         "user": current_user,
         "profile_user": profile_user,
         "reviews": reviews,
+        "liked_ids": liked_ids,
+        "next_cursor": next_cursor,
+        "page_url": f"/user/{profile_user.username}",
         "title": f"Профиль {profile_user.username}",
-        "is_own_profile": (current_user and current_user.id == profile_user.id)
-    })
\ No newline at end of file
+        "is_own_profile": (current_user and current_user.id == profile_user.id),
+        "is_following": is_following
+    })
+    tags = [f"user:{profile_user.id}", *(f"review:{review.id}" for review in reviews)]
+    return page_cache.store(request, current_user, response, tags)
+
+@app.post("/user/{username}/follow")
+async def toggle_follow(
+    username: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user: CurrentUser = Depends(get_current_user)
+):
+    if not user:
+        if wants_json(request):
+            return JSONResponse({"error": "login required", "login_url": "/login"}, status_code=401)
+        flash(request, "ВОЙДИТЕ, ЧТОБЫ ПОДПИСАТЬСЯ", "error")
+        return RedirectResponse(url="/login", status_code=303)
+    followee_id = (await db.execute(select(User.id).where(User.username == username))).scalar_one_or_none()
+    if followee_id is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if followee_id == user.id:
+        raise HTTPException(status_code=400, detail="Cannot follow yourself")
+    toggled = await crud.toggle_follow(db, user.id, followee_id)
+    job = "backfill_timeline" if toggled.following else "retract_author"
+    await job_queue.enqueue(job, db, follower_id=user.id, followee_id=followee_id)
+    await db.commit()
+    bus.publish("pages", tags=[f"user:{followee_id}", f"user:{user.id}"])
+    if wants_json(request):
+        return JSONResponse({"username": username, "following": toggled.following, "follower_count": toggled.follower_count})
+    return RedirectResponse(url=f"/user/{username}", status_code=303)
\ No newline at end of file
@@ -0,0 +1,118 @@
+import logging
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .config import DB_SLOW_QUERY_MS, METRICS_SHOW_STATEMENTS
+
+logger = logging.getLogger("bookmind.db")
+
+
+class _PoolStats:
+    def __init__(self):
+        self.acquisitions = 0
+        self.acquire_wait_total = 0.0
+        self.acquire_wait_max = 0.0
+        self.acquire_timeouts = 0
+        self.overflow_peak = 0
+        self.connects = 0
+
+
+class _Stats:
+    def __init__(self):
+        self.queries = 0
+        self.query_time_total = 0.0
+        self.slow_queries = 0
+        self.slowest_query_ms = 0.0
+        self.slowest_statement = None
+
+
+stats = _Stats()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = _PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.stats.acquire_timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.stats.acquisitions += 1
+            self.stats.acquire_wait_total += waited
+            self.stats.acquire_wait_max = max(self.stats.acquire_wait_max, waited)
+            self.stats.overflow_peak = max(self.stats.overflow_peak, self.overflow())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "query_started", None)
+    if started is None:
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    stats.queries += 1
+    stats.query_time_total += elapsed_ms
+    if elapsed_ms >= DB_SLOW_QUERY_MS:
+        stats.slow_queries += 1
+        logger.warning("slow query (%.1f ms): %s", elapsed_ms, statement[:500])
+    if elapsed_ms > stats.slowest_query_ms:
+        stats.slowest_query_ms = elapsed_ms
+        stats.slowest_statement = statement[:500]
+
+
+def instrument_engine(engine):
+    sync_engine = engine.sync_engine
+
+    def on_connect(dbapi_connection, connection_record):
+        pool_stats = getattr(sync_engine.pool, "stats", None)
+        if pool_stats is not None:
+            pool_stats.connects += 1
+
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine.pool, "connect", on_connect)
+
+
+def pool_snapshot(engine) -> dict:
+    pool = engine.sync_engine.pool
+    snapshot = {"class": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        snapshot.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        })
+    pool_stats = getattr(pool, "stats", None)
+    if pool_stats is not None:
+        snapshot.update({
+            "overflow_peak": max(pool_stats.overflow_peak, 0),
+            "connects": pool_stats.connects,
+            "acquisitions": pool_stats.acquisitions,
+            "acquire_timeouts": pool_stats.acquire_timeouts,
+            "acquire_wait_avg_ms": round(pool_stats.acquire_wait_total / pool_stats.acquisitions * 1000, 3) if pool_stats.acquisitions else 0,
+            "acquire_wait_max_ms": round(pool_stats.acquire_wait_max * 1000, 3),
+        })
+    return snapshot
+
+
+def query_snapshot() -> dict:
+    return {
+        "count": stats.queries,
+        "total_ms": round(stats.query_time_total, 3),
+        "slow_threshold_ms": DB_SLOW_QUERY_MS,
+        "slow": stats.slow_queries,
+        "slowest_ms": round(stats.slowest_query_ms, 3),
+        "slowest_statement": stats.slowest_statement if METRICS_SHOW_STATEMENTS else None,
+    }
@@ -1,8 +1,16 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Text, DateTime, ForeignKey, Index, UniqueConstraint, Computed, text
+from sqlalchemy.dialects.postgresql import TSVECTOR, JSONB
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 from .database import Base
 
+SEARCH_CONFIG = "russian"
+REVIEW_SEARCH_VECTOR = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(book_title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(author, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(text, '')), 'B')"
+)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -10,11 +18,46 @@ class User(Base):
     username = Column(String, unique=True, nullable=False)
     email = Column(String, unique=True, nullable=False)
     hashed_password = Column(String, nullable=False)
+    review_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    likes_received = Column(Integer, nullable=False, default=0, server_default="0")
+    follower_count = Column(Integer, nullable=False, default=0, server_default="0")
+    following_count = Column(Integer, nullable=False, default=0, server_default="0")
+    likes_updated_at = Column(DateTime(timezone=True))
     
     reviews = relationship("Review", back_populates="owner")
     comments = relationship("Comment", back_populates="user")
     likes = relationship("Like", back_populates="user", cascade="all, delete-orphan")
 
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return 0
+        return self.rating_sum / self.review_count
+
+class Book(Base):
+    __tablename__ = "books"
+
+    id = Column(Integer, primary_key=True, index=True)
+    title = Column(String, nullable=False)
+    author = Column(String, nullable=False)
+    normalized_key = Column(String, unique=True, nullable=False)
+    cover_url = Column(String)
+    review_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+
+    reviews = relationship("Review", back_populates="book")
+
+    __table_args__ = (
+        Index("ix_books_review_count_id", "review_count", "id"),
+    )
+
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return 0
+        return self.rating_sum / self.review_count
+
 class Review(Base):
     __tablename__ = "reviews"
 
@@ -27,12 +70,26 @@ class Review(Base):
     cover_url = Column(String)
     status = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    likes_updated_at = Column(DateTime(timezone=True))
+    search_vector = deferred(Column(TSVECTOR, Computed(REVIEW_SEARCH_VECTOR, persisted=True)))
     
     user_id = Column(Integer, ForeignKey("users.id"))
+    book_id = Column(Integer, ForeignKey("books.id"), index=True)
     owner = relationship("User", back_populates="reviews")
+    book = relationship("Book", back_populates="reviews")
     comments = relationship("Comment", back_populates="review", cascade="all, delete-orphan")
     likes = relationship("Like", back_populates="review", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_reviews_created_at_id", "created_at", "id"),
+        Index("ix_reviews_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_reviews_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_reviews_book_title_trgm", "book_title", postgresql_using="gin", postgresql_ops={"book_title": "gin_trgm_ops"}),
+        Index("ix_reviews_author_trgm", "author", postgresql_using="gin", postgresql_ops={"author": "gin_trgm_ops"}),
+    )
+
 class Comment(Base):
     __tablename__ = "comments"
 
@@ -46,6 +103,10 @@ class Comment(Base):
     user = relationship("User", back_populates="comments")
     review = relationship("Review", back_populates="comments")
 
+    __table_args__ = (
+        Index("ix_comments_review_id_created_at_id", "review_id", "created_at", "id"),
+    )
+
 class Like(Base):
     __tablename__ = "likes"
 
@@ -54,4 +115,90 @@ class Like(Base):
     review_id = Column(Integer, ForeignKey("reviews.id"))
 
     user = relationship("User", back_populates="likes")
-    review = relationship("Review", back_populates="likes")
\ No newline at end of file
+    review = relationship("Review", back_populates="likes")
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "review_id", name="uq_likes_user_id_review_id"),
+    )
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(BigInteger, primary_key=True)
+    name = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    run_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    failed_at = Column(DateTime(timezone=True))
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_jobs_run_at_id", "run_at", "id", postgresql_where=text("failed_at IS NULL")),
+    )
+
+class ReviewNeighbor(Base):
+    __tablename__ = "review_neighbors"
+
+    review_id = Column(Integer, ForeignKey("reviews.id", ondelete="CASCADE"), primary_key=True)
+    neighbor_id = Column(Integer, ForeignKey("reviews.id", ondelete="CASCADE"), primary_key=True, index=True)
+    score = Column(Float, nullable=False)
+
+class UserNeighbor(Base):
+    __tablename__ = "user_neighbors"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    neighbor_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, index=True)
+    score = Column(Float, nullable=False)
+
+class RecommendationRun(Base):
+    __tablename__ = "recommendation_runs"
+
+    id = Column(Integer, primary_key=True)
+    mode = Column(String, nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), server_default=func.now())
+    reviews = Column(Integer, nullable=False, default=0)
+    users = Column(Integer, nullable=False, default=0)
+
+class UserRecommendation(Base):
+    __tablename__ = "user_recommendations"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    review_id = Column(Integer, ForeignKey("reviews.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("ix_user_recommendations_user_id_score_review_id", "user_id", "score", "review_id"),
+        Index("ix_user_recommendations_review_id", "review_id"),
+    )
+
+class Cover(Base):
+    __tablename__ = "covers"
+
+    hash = Column(String(64), primary_key=True)
+    source_url = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class Follow(Base):
+    __tablename__ = "follows"
+
+    follower_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    followee_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_follows_followee_id_follower_id", "followee_id", "follower_id"),
+    )
+
+class TimelineEntry(Base):
+    __tablename__ = "timeline_entries"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    created_at = Column(DateTime(timezone=True), primary_key=True)
+    review_id = Column(Integer, primary_key=True)
+    author_id = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_timeline_entries_review_id", "review_id"),
+    )
\ No newline at end of file
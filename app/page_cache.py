@@ -0,0 +1,79 @@
+import hashlib
+import itertools
+from dataclasses import dataclass
+
+from fastapi import Request, Response
+from fastapi.responses import HTMLResponse
+
+from .cache import TTLCache, MISSING
+from .config import PAGE_CACHE_SIZE, PAGE_CACHE_TTL
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    body: bytes
+    etag: str
+    tags: dict
+
+
+class PageCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self._pages = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations = TTLCache(maxsize=maxsize * 32, ttl=ttl)
+        self._counter = itertools.count(1)
+
+    @staticmethod
+    def key(request: Request, viewer_class: str = "anon"):
+        return viewer_class, request.url.path, request.url.query
+
+    @staticmethod
+    def cacheable(request: Request, user) -> bool:
+        return user is None and not request.session.get("flash_messages")
+
+    def get(self, request: Request, user):
+        if not self.cacheable(request, user):
+            return None
+        page = self._pages.get(self.key(request))
+        if page is MISSING:
+            return None
+        if any(self._generations.get(tag) != generation for tag, generation in page.tags.items()):
+            self._pages.delete(self.key(request))
+            return None
+        return self._respond(request, page)
+
+    def store(self, request: Request, user, response: Response, tags) -> Response:
+        if not self.cacheable(request, user) or response.status_code != 200:
+            return response
+        body = bytes(response.body)
+        page = CachedPage(
+            body=body,
+            etag='W/"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest(),
+            tags={tag: self._generation(tag) for tag in tags}
+        )
+        self._pages.set(self.key(request), page)
+        return self._respond(request, page)
+
+    def _generation(self, tag) -> int:
+        generation = self._generations.get(tag)
+        if generation is MISSING:
+            generation = next(self._counter)
+        self._generations.set(tag, generation)
+        return generation
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            self._generations.delete(tag)
+
+    def clear(self):
+        self._pages.clear()
+        self._generations.clear()
+
+    @staticmethod
+    def _respond(request: Request, page: CachedPage) -> Response:
+        headers = {"ETag": page.etag, "Cache-Control": "no-cache", "Vary": "Cookie"}
+        if page.etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        return HTMLResponse(content=page.body, headers=headers)
+
+
+page_cache = PageCache(maxsize=PAGE_CACHE_SIZE, ttl=PAGE_CACHE_TTL)
@@ -0,0 +1,58 @@
+import base64
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{item_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str | None):
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, item_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(query, created_col, id_col, cursor: str | None, limit: int, newest_first: bool = True):
+    position = decode_cursor(cursor)
+    if position is not None:
+        if newest_first:
+            query = query.where(tuple_(created_col, id_col) < position)
+        else:
+            query = query.where(tuple_(created_col, id_col) > position)
+    if newest_first:
+        query = query.order_by(created_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(created_col.asc(), id_col.asc())
+    return query.limit(limit + 1)
+
+
+def split_page(rows, limit: int, key=lambda row: (row.created_at, row.id)):
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
+
+
+def encode_score_cursor(score: float, item_id: int) -> str:
+    raw = f"{score!r}|{item_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_score_cursor(cursor: str | None):
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        score, item_id = raw.rsplit("|", 1)
+        return float(score), int(item_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
@@ -0,0 +1,198 @@
+from sqlalchemy import select, delete, insert, func, tuple_, union_all, literal_column, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from .config import (
+    RECOMMEND_TOP_K, RECOMMEND_MIN_COMMON, RECOMMEND_MIN_RATING, RECOMMEND_BLOCK_SIZE, RECOMMEND_MAX_ITEMS
+)
+from .models import Like, Review, User, ReviewNeighbor, UserNeighbor, UserRecommendation, RecommendationRun
+from .pagination import encode_score_cursor, decode_score_cursor
+
+INSERT_CHUNK = 10000
+
+
+def _require_numpy():
+    try:
+        import numpy as np
+        from scipy import sparse
+    except ImportError as e:
+        raise RuntimeError("numpy and scipy are required to compute recommendations") from e
+    return np, sparse
+
+
+async def _load_likes(db: AsyncSession, np, sparse):
+    chunks = []
+    result = await db.stream(select(Like.user_id, Like.review_id).execution_options(yield_per=50000))
+    async for partition in result.partitions():
+        chunks.append(np.fromiter(
+            (value for row in partition for value in row), dtype=np.int64, count=2 * len(partition)
+        ))
+    pairs = np.concatenate(chunks).reshape(-1, 2) if chunks else np.empty((0, 2), dtype=np.int64)
+    users, user_index = np.unique(pairs[:, 0], return_inverse=True)
+    reviews, review_index = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(user_index), dtype=np.float32), (user_index, review_index)),
+        shape=(len(users), len(reviews))
+    )
+    return users, reviews, matrix
+
+
+def top_neighbors(np, rows, targets, top_k: int, min_common: int):
+    counts = np.asarray(rows.sum(axis=1)).ravel()
+    common = (rows[targets] @ rows.T).tocsr()
+    owner = np.repeat(np.arange(len(targets)), np.diff(common.indptr))
+    neighbor = common.indices
+    scores = common.data / np.sqrt(counts[targets][owner] * counts[neighbor])
+    keep = (common.data >= min_common) & (neighbor != targets[owner])
+    owner, neighbor, scores = owner[keep], neighbor[keep], scores[keep]
+
+    order = np.lexsort((-scores, owner))
+    owner, neighbor, scores = owner[order], neighbor[order], scores[order]
+    rank = np.arange(len(owner)) - np.searchsorted(owner, owner, side="left")
+    keep = rank < top_k
+    return targets[owner[keep]], neighbor[keep], scores[keep]
+
+
+async def _store_neighbors(db, model, key_column, np, rows, ids, targets, top_k, min_common, stale_ids=()):
+    if len(stale_ids):
+        await db.execute(delete(model).where(key_column.in_([int(i) for i in stale_ids])))
+    for start in range(0, len(targets), RECOMMEND_BLOCK_SIZE):
+        block = targets[start:start + RECOMMEND_BLOCK_SIZE]
+        await db.execute(delete(model).where(key_column.in_([int(i) for i in ids[block]])))
+        owner, neighbor, scores = top_neighbors(np, rows, block, top_k, min_common)
+        values = [
+            {key_column.key: int(a), "neighbor_id": int(b), "score": float(s)}
+            for a, b, s in zip(ids[owner], ids[neighbor], scores)
+        ]
+        for chunk in range(0, len(values), INSERT_CHUNK):
+            await db.execute(insert(model), values[chunk:chunk + INSERT_CHUNK])
+
+
+async def _store_recommendations(db: AsyncSession, user_ids: list[int], max_items: int = RECOMMEND_MAX_ITEMS):
+    await db.execute(delete(UserRecommendation).where(UserRecommendation.user_id.in_(user_ids)))
+    from_liked = (
+        select(Like.user_id, ReviewNeighbor.neighbor_id.label("review_id"), ReviewNeighbor.score)
+        .join(Like, Like.review_id == ReviewNeighbor.review_id)
+        .where(Like.user_id.in_(user_ids))
+    )
+    from_similar_users = (
+        select(
+            UserNeighbor.user_id, Review.id.label("review_id"),
+            (UserNeighbor.score * Review.rating / literal_column("10.0")).label("score")
+        )
+        .join(Review, Review.user_id == UserNeighbor.neighbor_id)
+        .where(UserNeighbor.user_id.in_(user_ids), Review.rating >= RECOMMEND_MIN_RATING)
+    )
+    candidates = union_all(from_liked, from_similar_users).subquery()
+    summed = (
+        select(candidates.c.user_id, candidates.c.review_id, func.sum(candidates.c.score).label("score"))
+        .join(Review, Review.id == candidates.c.review_id)
+        .where(
+            Review.user_id.is_distinct_from(candidates.c.user_id),
+            ~exists().where(Like.user_id == candidates.c.user_id, Like.review_id == candidates.c.review_id)
+        )
+        .group_by(candidates.c.user_id, candidates.c.review_id)
+        .subquery()
+    )
+    ranked = select(
+        summed,
+        func.row_number().over(
+            partition_by=summed.c.user_id, order_by=(summed.c.score.desc(), summed.c.review_id.desc())
+        ).label("rank")
+    ).subquery()
+    await db.execute(insert(UserRecommendation).from_select(
+        ["user_id", "review_id", "score"],
+        select(ranked.c.user_id, ranked.c.review_id, ranked.c.score).where(ranked.c.rank <= max_items)
+    ))
+
+
+async def _changed_ids(db: AsyncSession, np, model, since):
+    ids = (await db.execute(select(model.id).where(model.likes_updated_at >= since))).scalars().all()
+    return np.array(ids, dtype=np.int64)
+
+
+async def refresh_recommendations(
+    db: AsyncSession,
+    full: bool = False,
+    top_k: int = RECOMMEND_TOP_K,
+    min_common: int = RECOMMEND_MIN_COMMON,
+) -> RecommendationRun:
+    np, sparse = _require_numpy()
+    started_at = (await db.execute(select(func.now()))).scalar_one()
+    since = None
+    if not full:
+        since = (await db.execute(select(func.max(RecommendationRun.started_at)))).scalar_one()
+
+    users, reviews, matrix = await _load_likes(db, np, sparse)
+    review_rows = matrix.T.tocsr()
+
+    if since is None:
+        await db.execute(delete(ReviewNeighbor))
+        await db.execute(delete(UserNeighbor))
+        await db.execute(delete(UserRecommendation))
+        review_targets = np.arange(len(reviews))
+        user_targets = np.arange(len(users))
+        recommend_ids = users
+        stale_reviews = stale_users = []
+    else:
+        changed_reviews = await _changed_ids(db, np, Review, since)
+        changed_users = await _changed_ids(db, np, User, since)
+        review_seeds = np.flatnonzero(np.isin(reviews, changed_reviews))
+        user_seeds = np.flatnonzero(np.isin(users, changed_users))
+
+        def likers(targets):
+            return review_rows[targets].indices
+
+        def liked(targets):
+            return matrix[targets].indices
+
+        review_targets = np.union1d(review_seeds, liked(np.union1d(user_seeds, likers(review_seeds))))
+        user_targets = np.union1d(user_seeds, likers(np.union1d(review_seeds, liked(user_seeds))))
+        stale_reviews = changed_reviews[~np.isin(changed_reviews, reviews)]
+        stale_users = changed_users[~np.isin(changed_users, users)]
+        recommend_ids = np.union1d(users[np.union1d(user_targets, likers(review_targets))], stale_users)
+
+    await _store_neighbors(
+        db, ReviewNeighbor, ReviewNeighbor.review_id, np, review_rows, reviews,
+        review_targets, top_k, min_common, stale_reviews
+    )
+    await _store_neighbors(
+        db, UserNeighbor, UserNeighbor.user_id, np, matrix, users,
+        user_targets, top_k, min_common, stale_users
+    )
+    for start in range(0, len(recommend_ids), RECOMMEND_BLOCK_SIZE):
+        await _store_recommendations(db, [int(i) for i in recommend_ids[start:start + RECOMMEND_BLOCK_SIZE]])
+    run = RecommendationRun(
+        mode="full" if since is None else "incremental",
+        started_at=started_at,
+        reviews=len(review_targets),
+        users=len(recommend_ids)
+    )
+    db.add(run)
+    await db.commit()
+    return run
+
+
+async def recommended_reviews(db: AsyncSession, user_id: int, after: str | None, limit: int):
+    query = (
+        select(Review, UserRecommendation.score)
+        .select_from(UserRecommendation)
+        .join(Review, Review.id == UserRecommendation.review_id)
+        .where(
+            UserRecommendation.user_id == user_id,
+            ~exists().where(Like.user_id == user_id, Like.review_id == UserRecommendation.review_id)
+        )
+        .options(joinedload(Review.owner))
+        .order_by(UserRecommendation.score.desc(), UserRecommendation.review_id.desc())
+        .limit(limit + 1)
+    )
+    position = decode_score_cursor(after)
+    if position is not None:
+        query = query.where(tuple_(UserRecommendation.score, UserRecommendation.review_id) < position)
+
+    rows = (await db.execute(query)).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last_review, last_score = rows[-1]
+    return rows, encode_score_cursor(last_score, last_review.id)
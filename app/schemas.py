@@ -1,3 +1,5 @@
+from datetime import datetime, timezone
+
 from pydantic import BaseModel, Field, EmailStr, field_validator
 
 class UserCreate(BaseModel):
@@ -19,4 +21,75 @@ class ReviewCreate(BaseModel):
     text: str = Field(..., min_length=10)
     description: str | None = None
     cover_url: str | None = None
-    status: str
\ No newline at end of file
+    status: str
+
+class ReviewImport(ReviewCreate):
+    created_at: datetime | None = None
+
+    @field_validator('created_at', mode='before')
+    @classmethod
+    def blank_created_at(cls, v):
+        return v or None
+
+    @field_validator('created_at')
+    @classmethod
+    def check_created_at(cls, v: datetime | None) -> datetime | None:
+        if v is None:
+            return v
+        if v.tzinfo is None:
+            v = v.replace(tzinfo=timezone.utc)
+        if v > datetime.now(timezone.utc):
+            raise ValueError("Дата не может быть в будущем")
+        return v
+
+class ReviewOut(BaseModel):
+    id: int
+    book_title: str
+    author: str
+    rating: int
+    text: str
+    cover_url: str
+    status: str | None
+    created_at: datetime
+    like_count: int
+    comment_count: int
+    username: str | None
+
+class ReviewDetailOut(ReviewOut):
+    description: str | None
+
+class ReviewPage(BaseModel):
+    items: list[ReviewOut]
+    next_cursor: str | None
+
+class CommentOut(BaseModel):
+    id: int
+    text: str
+    created_at: datetime
+    username: str | None
+
+class CommentPage(BaseModel):
+    items: list[CommentOut]
+    next_cursor: str | None
+
+class ProfileOut(BaseModel):
+    username: str
+    review_count: int
+    average_rating: float
+    likes_received: int
+    follower_count: int
+    following_count: int
+
+class ProfilePage(ReviewPage):
+    user: ProfileOut
+
+class BookOut(BaseModel):
+    id: int
+    title: str
+    author: str
+    cover_url: str
+    review_count: int
+    average_rating: float
+
+class BookList(BaseModel):
+    items: list[BookOut]
\ No newline at end of file
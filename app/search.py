@@ -0,0 +1,37 @@
+from sqlalchemy import select, func, or_, tuple_, literal, String
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from .models import Review, SEARCH_CONFIG
+from .pagination import encode_score_cursor, decode_score_cursor
+
+
+async def search_reviews(db: AsyncSession, q: str, after: str | None, limit: int):
+    term = literal(q, String)
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, term)
+    rank = (
+        func.ts_rank_cd(Review.search_vector, tsquery)
+        + func.greatest(func.similarity(Review.book_title, term), func.similarity(Review.author, term))
+    ).label("rank")
+
+    query = (
+        select(Review, rank)
+        .where(or_(
+            Review.search_vector.op("@@")(tsquery),
+            Review.book_title.op("%")(term),
+            Review.author.op("%")(term)
+        ))
+        .options(joinedload(Review.owner))
+        .order_by(rank.desc(), Review.id.desc())
+        .limit(limit + 1)
+    )
+    position = decode_score_cursor(after)
+    if position is not None:
+        query = query.where(tuple_(rank, Review.id) < position)
+
+    rows = (await db.execute(query)).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last_review, last_rank = rows[-1]
+    return rows, encode_score_cursor(last_rank, last_review.id)
@@ -0,0 +1,92 @@
+import json
+import logging
+import os
+import re
+import time
+from contextlib import contextmanager
+
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import text, exc
+
+from .config import TEMPLATE_BYTECODE_CACHE, TEMPLATE_CACHE_DIR
+
+logger = logging.getLogger("bookmind.startup")
+
+_process_started = time.perf_counter()
+_REVISION_RE = re.compile(r'^revision = "([^"]+)"', re.M)
+_DOWN_REVISION_RE = re.compile(r'^down_revision = "([^"]+)"', re.M)
+
+
+class StartupReport:
+    def __init__(self):
+        self.phases = {}
+        self.total_ms = None
+        self.since_import_ms = None
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - started) * 1000, 2)
+
+    @contextmanager
+    def measure(self):
+        started = time.perf_counter()
+        yield self
+        finished = time.perf_counter()
+        self.total_ms = round((finished - started) * 1000, 2)
+        self.since_import_ms = round((finished - _process_started) * 1000, 2)
+        logger.info(json.dumps({"event": "startup", **self.snapshot()}))
+
+    def snapshot(self) -> dict:
+        return {"total_ms": self.total_ms, "since_import_ms": self.since_import_ms, "phases": self.phases}
+
+
+startup_report = StartupReport()
+
+
+def template_bytecode_cache():
+    if not TEMPLATE_BYTECODE_CACHE:
+        return None
+    if TEMPLATE_CACHE_DIR:
+        os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+        return FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+    return FileSystemBytecodeCache()
+
+
+def warm_templates(env) -> int:
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+def migration_head(versions_dir: str = "migrations/versions") -> str | None:
+    revisions, parents = set(), set()
+    for name in os.listdir(versions_dir):
+        if not name.endswith(".py"):
+            continue
+        with open(os.path.join(versions_dir, name), encoding="utf-8") as f:
+            source = f.read()
+        revision = _REVISION_RE.search(source)
+        down_revision = _DOWN_REVISION_RE.search(source)
+        if revision:
+            revisions.add(revision.group(1))
+        if down_revision:
+            parents.add(down_revision.group(1))
+    heads = revisions - parents
+    return heads.pop() if len(heads) == 1 else None
+
+
+async def check_schema(engine):
+    async with engine.connect() as conn:
+        try:
+            current = (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+        except exc.ProgrammingError:
+            current = None
+    head = migration_head()
+    if current != head:
+        logger.warning("database schema is at %s but migrations are at %s; run `alembic upgrade head`", current, head)
+    return current
@@ -0,0 +1,135 @@
+from sqlalchemy import select, delete, exists, literal, union, Integer
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from .cache import TTLCache, MISSING
+from .config import FANOUT_MAX_FOLLOWERS, TIMELINE_FANOUT_BATCH, TIMELINE_BACKFILL, TIMELINE_PULL_AUTHORS_TTL
+from .models import Follow, Review, TimelineEntry, User
+from .pagination import keyset_page, split_page
+
+_pull_authors = TTLCache(maxsize=1, ttl=TIMELINE_PULL_AUTHORS_TTL)
+
+
+def clear_pull_authors():
+    _pull_authors.clear()
+
+
+async def _fans_out(db: AsyncSession, author_id: int) -> bool:
+    follower_count = (await db.execute(select(User.follower_count).where(User.id == author_id))).scalar_one_or_none()
+    return follower_count is not None and follower_count <= FANOUT_MAX_FOLLOWERS
+
+
+async def fanout_review(db: AsyncSession, review_id: int) -> int:
+    review = (await db.execute(
+        select(Review.user_id, Review.created_at).where(Review.id == review_id)
+    )).first()
+    if review is None or not await _fans_out(db, review.user_id):
+        return 0
+    delivered, after = 0, 0
+    while True:
+        followers = (await db.execute(
+            select(Follow.follower_id)
+            .where(Follow.followee_id == review.user_id, Follow.follower_id > after)
+            .order_by(Follow.follower_id)
+            .limit(TIMELINE_FANOUT_BATCH)
+        )).scalars().all()
+        if not followers:
+            break
+        await db.execute(
+            insert(TimelineEntry)
+            .values([
+                {"user_id": f, "created_at": review.created_at, "review_id": review_id, "author_id": review.user_id}
+                for f in followers
+            ])
+            .on_conflict_do_nothing()
+        )
+        await db.commit()
+        delivered += len(followers)
+        after = followers[-1]
+        if len(followers) < TIMELINE_FANOUT_BATCH:
+            break
+    return delivered
+
+
+async def retract_review(db: AsyncSession, review_id: int) -> int:
+    result = await db.execute(delete(TimelineEntry).where(TimelineEntry.review_id == review_id))
+    await db.commit()
+    return result.rowcount
+
+
+async def _follows(db: AsyncSession, follower_id: int, followee_id: int) -> bool:
+    return (await db.execute(
+        select(exists().where(Follow.follower_id == follower_id, Follow.followee_id == followee_id))
+    )).scalar()
+
+
+async def backfill_timeline(db: AsyncSession, follower_id: int, followee_id: int):
+    if not await _follows(db, follower_id, followee_id) or not await _fans_out(db, followee_id):
+        return
+    recent = (
+        select(
+            literal(follower_id, Integer), Review.created_at, Review.id, Review.user_id
+        )
+        .where(Review.user_id == followee_id)
+        .order_by(Review.created_at.desc(), Review.id.desc())
+        .limit(TIMELINE_BACKFILL)
+    )
+    await db.execute(
+        insert(TimelineEntry)
+        .from_select(["user_id", "created_at", "review_id", "author_id"], recent)
+        .on_conflict_do_nothing()
+    )
+    await db.commit()
+
+
+async def retract_author(db: AsyncSession, follower_id: int, followee_id: int):
+    if await _follows(db, follower_id, followee_id):
+        return
+    await db.execute(
+        delete(TimelineEntry).where(TimelineEntry.user_id == follower_id, TimelineEntry.author_id == followee_id)
+    )
+    await db.commit()
+
+
+async def _pull_mode_authors(db: AsyncSession) -> list[int]:
+    authors = _pull_authors.get("all")
+    if authors is MISSING:
+        authors = (await db.execute(
+            select(User.id).where(User.follower_count > FANOUT_MAX_FOLLOWERS)
+        )).scalars().all()
+        _pull_authors.set("all", authors)
+    return authors
+
+
+async def following_timeline(db: AsyncSession, user_id: int, before: str | None, limit: int):
+    pushed = keyset_page(
+        select(TimelineEntry.review_id.label("id"), TimelineEntry.created_at).where(
+            TimelineEntry.user_id == user_id,
+            exists().where(Review.id == TimelineEntry.review_id)
+        ),
+        TimelineEntry.created_at, TimelineEntry.review_id, before, limit
+    ).subquery()
+    entries = select(pushed.c.id, pushed.c.created_at)
+
+    authors = await _pull_mode_authors(db)
+    if authors:
+        authors = (await db.execute(
+            select(Follow.followee_id).where(Follow.follower_id == user_id, Follow.followee_id.in_(authors))
+        )).scalars().all()
+    if authors:
+        pulled = keyset_page(
+            select(Review.id, Review.created_at).where(Review.user_id.in_(authors)),
+            Review.created_at, Review.id, before, limit
+        ).subquery()
+        entries = union(entries, select(pulled.c.id, pulled.c.created_at))
+    entries = entries.subquery()
+
+    query = (
+        select(Review)
+        .join(entries, entries.c.id == Review.id)
+        .options(joinedload(Review.owner))
+        .order_by(Review.created_at.desc(), Review.id.desc())
+        .limit(limit + 1)
+    )
+    return split_page((await db.execute(query)).scalars().all(), limit)
@@ -1,28 +1,109 @@
+import asyncio
 import httpx
-from .config import GOOGLE_BOOKS_API_KEY
+from .cache import TTLCache, SQLiteCacheStore, MISSING
+from .instrumentation import timed
+from .config import (
+    GOOGLE_BOOKS_API_KEY, GOOGLE_BOOKS_URL, GOOGLE_BOOKS_TIMEOUT,
+    GOOGLE_BOOKS_CACHE_SIZE, GOOGLE_BOOKS_CACHE_TTL, GOOGLE_BOOKS_NEGATIVE_TTL, GOOGLE_BOOKS_CACHE_PATH
+)
 
-async def fetch_book_info(title: str):
-    url = "https://www.googleapis.com/books/v1/volumes"
-    params = {"q": title, "maxResults": 1, "key": GOOGLE_BOOKS_API_KEY}
+_client: httpx.AsyncClient | None = None
+_book_cache = TTLCache(maxsize=GOOGLE_BOOKS_CACHE_SIZE, ttl=GOOGLE_BOOKS_CACHE_TTL)
+_book_store = SQLiteCacheStore(GOOGLE_BOOKS_CACHE_PATH) if GOOGLE_BOOKS_CACHE_PATH else None
+_inflight: dict[str, asyncio.Task] = {}
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(GOOGLE_BOOKS_TIMEOUT, connect=min(GOOGLE_BOOKS_TIMEOUT, 2.0)),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        )
+    return _client
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+async def warm_book_cache():
+    if _book_store is None:
+        return
+    entries = await asyncio.to_thread(_book_store.load, GOOGLE_BOOKS_CACHE_SIZE)
+    for key, value, ttl in entries:
+        _book_cache.set(key, value, ttl)
+
+def clear_book_cache():
+    _book_cache.clear()
+
+def normalize_title(title: str) -> str:
+    return " ".join(title.lower().split())
+
+async def _request_book_info(query: str):
+    params = {"q": query, "maxResults": 1, "key": GOOGLE_BOOKS_API_KEY}
+    try:
+        with timed("http"):
+            response = await get_http_client().get(GOOGLE_BOOKS_URL, params=params)
+    except httpx.HTTPError as e:
+        print(f"Error fetching book: {e!r}")
+        return MISSING
+    if response.status_code != 200:
+        print(f"Error fetching book: HTTP {response.status_code}")
+        return MISSING
+
+    try:
+        data = response.json()
+        if "items" not in data:
+            return None
+        book = data["items"][0]["volumeInfo"]
+    except (ValueError, KeyError, IndexError) as e:
+        print(f"Error fetching book: {e!r}")
+        return MISSING
+    links = book.get("imageLinks", {})
+    cover = links.get("thumbnail") or links.get("smallThumbnail") or ""
+    
+    cover = cover.replace("http://", "https://")
     
-    async with httpx.AsyncClient() as client:
+    return {
+        "title": book.get("title", "Без названия"),
+        "author": ", ".join(book.get("authors", ["Автор неизвестен"])),
+        "cover_url": cover,
+        "description": book.get("description", "")[:500]
+    }
+
+async def _lookup_and_cache(key: str):
+    result = await _request_book_info(key)
+    if result is MISSING:
+        return MISSING
+    ttl = GOOGLE_BOOKS_CACHE_TTL if result else GOOGLE_BOOKS_NEGATIVE_TTL
+    _book_cache.set(key, result, ttl)
+    if _book_store is not None:
         try:
-            response = await client.get(url, params=params)
-            if response.status_code == 200:
-                data = response.json()
-                if "items" in data:
-                    book = data["items"][0]["volumeInfo"]
-                    links = book.get("imageLinks", {})
-                    cover = links.get("thumbnail") or links.get("smallThumbnail") or ""
-                    
-                    cover = cover.replace("http://", "https://")
-                    
-                    return {
-                        "title": book.get("title", "Без названия"),
-                        "author": ", ".join(book.get("authors", ["Автор неизвестен"])),
-                        "cover_url": cover,
-                        "description": book.get("description", "")[:500]
-                    }
+            await asyncio.to_thread(_book_store.save, key, result, ttl)
         except Exception as e:
-            print(f"Error fetching book: {e}")
-    return None
\ No newline at end of file
+            print(f"Error persisting book cache: {e}")
+    return result
+
+class BookLookupError(Exception):
+    pass
+
+async def fetch_book_info(title: str, raise_on_error: bool = False):
+    key = normalize_title(title)
+    if not key:
+        return None
+    cached = _book_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_lookup_and_cache(key))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    result = await asyncio.shield(task)
+    if result is MISSING:
+        if raise_on_error:
+            raise BookLookupError(key)
+        return None
+    return result
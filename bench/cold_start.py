@@ -0,0 +1,96 @@
+"""Time from process spawn to the first 200 on `/` for a fresh uvicorn worker.
+
+Starts `uvicorn app.main:app` as a subprocess against DATABASE_URL (which must
+already be migrated) several times and reports the distribution, plus the
+startup phase timings each worker exposes under `/metrics`:
+
+    python -m bench.cold_start --runs 5 --target-ms 3000
+    python -m bench.cold_start --no-bytecode-cache
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from bench.stats import summary
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def cold_start(env: dict, timeout: float):
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with {server.returncode}")
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError(f"no 200 on / within {timeout}s")
+                try:
+                    if client.get("/").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+            elapsed = time.perf_counter() - started
+            token = env.get("METRICS_TOKEN")
+            headers = {"Authorization": f"Bearer {token}"} if token else {}
+            startup = client.get("/metrics", headers=headers).json().get("startup")
+    finally:
+        server.terminate()
+        server.wait()
+    return elapsed, startup
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=None, help="exit non-zero if p50 exceeds this")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--no-bytecode-cache", action="store_true")
+    parser.add_argument("--no-warmup", action="store_true")
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="bookmind-jinja-")
+    env = {
+        **os.environ,
+        "TEMPLATE_CACHE_DIR": cache_dir,
+        "TEMPLATE_BYTECODE_CACHE": "false" if args.no_bytecode_cache else "true",
+        "TEMPLATE_WARMUP": "false" if args.no_warmup else "true",
+        "JOB_WORKERS": os.environ.get("JOB_WORKERS", "1"),
+    }
+    samples = []
+    try:
+        for run in range(args.runs):
+            elapsed, startup = cold_start(env, args.timeout)
+            samples.append(elapsed)
+            label = "empty bytecode cache" if run == 0 and not args.no_bytecode_cache else ""
+            print(f"run {run + 1}: {elapsed * 1000:.0f} ms to first 200; startup {json.dumps(startup)} {label}".rstrip())
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    result = summary(samples)
+    print(json.dumps({"time_to_first_200": result}, indent=2))
+    if args.target_ms is not None and result["p50_ms"] > args.target_ms:
+        print(f"p50 {result['p50_ms']} ms exceeds target {args.target_ms} ms", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
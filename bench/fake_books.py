@@ -0,0 +1,34 @@
+"""Local stand-in for the Google Books volumes endpoint."""
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+        if query.startswith("missing"):
+            body = {"totalItems": 0}
+        else:
+            body = {"items": [{"volumeInfo": {
+                "title": query.title(),
+                "authors": ["Fake Author"],
+                "description": f"Description of {query}",
+                "imageLinks": {"thumbnail": "http://covers.invalid/cover.jpg"},
+            }}]}
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_books_server(host="127.0.0.1", port=0):
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}/books/v1/volumes"
@@ -0,0 +1,81 @@
+"""Latency of an unrelated page while a burst of logins is being processed.
+
+Runs the app in-process over httpx's ASGI transport against DATABASE_URL
+(which must already be migrated):
+
+    python -m bench.login_storm --logins 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+import httpx
+
+from app.main import app
+from bench.stats import summary
+
+
+async def probe(client, stop, path):
+    samples = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get(path)
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+        await asyncio.sleep(0.005)
+    return samples
+
+
+async def storm(transport, username, password, logins, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                response = await client.post("/login", data={"username": username, "password": password})
+                assert response.headers.get("location") == "/", "login failed"
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    return time.perf_counter() - started
+
+
+async def run(args):
+    transport = httpx.ASGITransport(app=app)
+    username = f"bench_{uuid.uuid4().hex[:8]}"
+    password = "bench-password"
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post(
+            "/register", data={"username": username, "email": f"{username}@example.com", "password": password}
+        )
+        assert response.headers.get("location") == "/login", "registration failed"
+
+        stop = asyncio.Event()
+        idle_probe = asyncio.create_task(probe(client, stop, args.probe_path))
+        await asyncio.sleep(args.baseline_seconds)
+        stop.set()
+        idle = await idle_probe
+
+        stop = asyncio.Event()
+        storm_probe = asyncio.create_task(probe(client, stop, args.probe_path))
+        elapsed = await storm(transport, username, password, args.logins, args.concurrency)
+        stop.set()
+        loaded = await storm_probe
+
+    print(f"{args.logins} logins in {elapsed:.2f}s ({args.logins / elapsed:.1f}/s)")
+    print(f"GET {args.probe_path} idle:        {summary(idle)}")
+    print(f"GET {args.probe_path} during storm: {summary(loaded)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--baseline-seconds", type=float, default=2.0)
+    parser.add_argument("--probe-path", default="/register")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
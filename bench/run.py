@@ -0,0 +1,207 @@
+"""Load test the main BookMind routes against a seeded synthetic dataset.
+
+Runs the app in-process over httpx's ASGI transport against DATABASE_URL
+(which must already be migrated; use a throwaway database, --seed truncates
+it) with Google Books replaced by a local fake server:
+
+    python -m bench.run --seed --requests 300 --concurrency 20 --output after.json
+    python -m bench.run --requests 300 --concurrency 20 --compare after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+import httpx
+
+from bench.fake_books import start_fake_books_server
+from bench.stats import summary
+
+
+def scenarios(data, rng):
+    review_ids = data["review_ids"]
+    users = data["users"]
+    return {
+        "feed": lambda i: ("GET", "/", None),
+        "top": lambda i: ("GET", "/top", None),
+        "review": lambda i: ("GET", f"/review/{rng.choice(review_ids)}", None),
+        "profile": lambda i: ("GET", f"/user/{rng.choice(users)}", None),
+        "book_search": lambda i: ("GET", f"/search?title=book {i % 50}", None),
+        "login": lambda i: ("POST", "/login", {"username": rng.choice(users), "password": data["password"]}),
+        "add_review": lambda i: ("POST", "/add", {
+            "book_title": f"Synthetic Book {rng.randint(0, 50)}",
+            "author": "Bench Author",
+            "rating": rng.randint(1, 10),
+            "text": "Benchmark review text that is long enough.",
+            "status": "read",
+        }),
+        "like": lambda i: ("POST", f"/review/{rng.choice(review_ids)}/like", None),
+    }
+
+
+async def _send(client, request):
+    method, path, form = request
+    response = await client.request(method, path, data=form)
+    assert response.status_code < 400, f"{method} {path} -> {response.status_code}"
+
+
+async def run_scenario(clients, make_request, requests, counter):
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i)
+    samples = []
+
+    async def worker(client):
+        while not queue.empty():
+            request = make_request(queue.get_nowait())
+            started = time.perf_counter()
+            await _send(client, request)
+            samples.append(time.perf_counter() - started)
+
+    queries_before = counter["queries"]
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(client) for client in clients))
+    elapsed = time.perf_counter() - started
+    result = summary(samples)
+    result["throughput_rps"] = round(len(samples) / elapsed, 1)
+    result["queries_per_request"] = round((counter["queries"] - queries_before) / len(samples), 2)
+    return result
+
+
+async def measure_memory(client, make_request, samples):
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(samples):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            await _send(client, make_request(i))
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_peak_kb_mean": round(sum(peaks) / len(peaks) / 1024, 1),
+        "alloc_peak_kb_max": round(max(peaks) / 1024, 1),
+    }
+
+
+async def logged_in_client(transport, username, password):
+    client = httpx.AsyncClient(transport=transport, base_url="http://bench")
+    response = await client.post("/login", data={"username": username, "password": password})
+    assert response.headers.get("location") == "/", "login failed"
+    return client
+
+
+async def run(args):
+    from sqlalchemy import event, select
+
+    from app.database import engine, async_session
+    from app.main import app
+    from app.models import User, Review
+    from bench.seed import PASSWORD, reset_database, seed
+
+    if args.seed:
+        started = time.perf_counter()
+        await reset_database()
+        await seed(args.users, args.reviews, args.comments, args.likes, rng_seed=args.rng_seed)
+        print(f"seeded in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    async with async_session() as db:
+        users = list((await db.execute(select(User.username).where(User.username.like("bench_user_%")))).scalars())
+        review_ids = list((await db.execute(select(Review.id))).scalars())
+    assert users and review_ids, "database is empty, run with --seed"
+    data = {"users": users, "review_ids": review_ids, "password": PASSWORD}
+
+    counter = {"queries": 0}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_query(*_):
+        counter["queries"] += 1
+
+    rng = random.Random(args.rng_seed)
+    transport = httpx.ASGITransport(app=app)
+    clients = []
+    if args.anonymous:
+        clients = [httpx.AsyncClient(transport=transport, base_url="http://bench") for _ in range(args.concurrency)]
+    else:
+        for username in rng.sample(users, min(args.concurrency, len(users))):
+            clients.append(await logged_in_client(transport, username, PASSWORD))
+
+    selected = args.only.split(",") if args.only else None
+    results = {}
+    try:
+        async with app.router.lifespan_context(app):
+            for name, make_request in scenarios(data, rng).items():
+                if selected and name not in selected:
+                    continue
+                requests = args.login_requests if name == "login" else args.requests
+                results[name] = await run_scenario(clients, make_request, requests, counter)
+                if args.memory_samples:
+                    results[name].update(await measure_memory(clients[0], make_request, args.memory_samples))
+                print(f"{name:12} {results[name]}", file=sys.stderr)
+    finally:
+        for client in clients:
+            await client.aclose()
+        await engine.dispose()
+
+    return {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+    }
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    print(f"{'scenario':12} {'p95 ms':>20} {'rps':>20} {'queries/req':>16}")
+    for name, result in current["results"].items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        print(
+            f"{name:12} "
+            f"{old['p95_ms']:>9} -> {result['p95_ms']:<8} "
+            f"{old['throughput_rps']:>9} -> {result['throughput_rps']:<8} "
+            f"{old['queries_per_request']:>6} -> {result['queries_per_request']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", action="store_true", help="truncate and reseed the database first")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--reviews", type=int, default=2000)
+    parser.add_argument("--comments", type=int, default=5000)
+    parser.add_argument("--likes", type=int, default=20000)
+    parser.add_argument("--rng-seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--login-requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--memory-samples", type=int, default=10)
+    parser.add_argument("--anonymous", action="store_true", help="browse without logging in (page cache enabled)")
+    parser.add_argument("--only", help="comma separated scenario names")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    args = parser.parse_args()
+
+    server, url = start_fake_books_server()
+    os.environ["GOOGLE_BOOKS_URL"] = url
+    os.environ["GOOGLE_BOOKS_CACHE_PATH"] = ""
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        server.shutdown()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Seed a database with a synthetic, skewed BookMind dataset."""
+import random
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, text
+
+from app.auth_utils import hash_password
+from app.books import rebuild_book_stats
+from app.database import engine, async_session
+from app.models import User, Review, Comment, Like
+
+CHUNK = 5000
+PASSWORD = "bench-password"
+
+
+def _pareto_weights(rng, count, alpha):
+    return [rng.paretovariate(alpha) for _ in range(count)]
+
+
+async def _insert_chunks(conn, table, rows):
+    ids = []
+    for start in range(0, len(rows), CHUNK):
+        result = await conn.execute(insert(table).returning(table.id), rows[start:start + CHUNK])
+        ids.extend(result.scalars())
+    return ids
+
+
+async def reset_database():
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "TRUNCATE jobs, likes, comments, reviews, books, users RESTART IDENTITY CASCADE"
+        ))
+
+
+async def seed(users=200, reviews=2000, comments=5000, likes=20000, alpha=1.2, rng_seed=42):
+    rng = random.Random(rng_seed)
+    now = datetime.now(timezone.utc)
+    hashed = await hash_password(PASSWORD)
+    usernames = [f"bench_user_{i}" for i in range(users)]
+
+    titles = [f"Synthetic Book {i}" for i in range(max(1, reviews // 5))]
+    title_weights = [1 / (rank + 1) for rank in range(len(titles))]
+    author_weights = _pareto_weights(rng, users, alpha)
+
+    async with engine.begin() as conn:
+        user_ids = await _insert_chunks(conn, User, [
+            {"username": name, "email": f"{name}@example.com", "hashed_password": hashed}
+            for name in usernames
+        ])
+
+        review_authors = rng.choices(user_ids, weights=author_weights, k=reviews)
+        review_titles = rng.choices(titles, weights=title_weights, k=reviews)
+        review_ids = await _insert_chunks(conn, Review, [
+            {
+                "book_title": title,
+                "author": f"Author of {title}",
+                "rating": rng.randint(1, 10),
+                "text": "Synthetic review text. " * rng.randint(1, 20),
+                "description": None,
+                "cover_url": None,
+                "status": rng.choice(["read", "reading", "planned"]),
+                "created_at": now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600)),
+                "user_id": author,
+            }
+            for author, title in zip(review_authors, review_titles)
+        ])
+        popularity = _pareto_weights(rng, len(review_ids), alpha)
+
+        pairs = set()
+        for _ in range(likes * 3):
+            if len(pairs) >= likes:
+                break
+            pairs.add((rng.choice(user_ids), rng.choices(review_ids, weights=popularity)[0]))
+        await _insert_chunks(conn, Like, [{"user_id": u, "review_id": r} for u, r in pairs])
+
+        comment_reviews = rng.choices(review_ids, weights=popularity, k=comments)
+        await _insert_chunks(conn, Comment, [
+            {
+                "text": "Synthetic comment " + str(i),
+                "user_id": rng.choice(user_ids),
+                "review_id": review_id,
+                "created_at": now - timedelta(seconds=rng.randint(0, 30 * 24 * 3600)),
+            }
+            for i, review_id in enumerate(comment_reviews)
+        ])
+
+        await conn.execute(text("""
+            UPDATE reviews r SET
+                like_count = (SELECT count(*) FROM likes l WHERE l.review_id = r.id),
+                comment_count = (SELECT count(*) FROM comments c WHERE c.review_id = r.id)
+        """))
+        await conn.execute(text("""
+            UPDATE users u SET review_count = s.cnt, rating_sum = s.total, likes_received = s.likes
+            FROM (
+                SELECT user_id, count(*) AS cnt, sum(rating) AS total, sum(like_count) AS likes
+                FROM reviews GROUP BY user_id
+            ) s
+            WHERE s.user_id = u.id
+        """))
+        await conn.execute(text("ANALYZE"))
+
+    async with async_session() as db:
+        await rebuild_book_stats(db)
+
+    return {"users": usernames, "review_ids": review_ids}
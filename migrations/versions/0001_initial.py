@@ -0,0 +1,68 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Databases created by the old startup ``create_all`` already have these
+tables: mark them with ``alembic stamp 0001`` before upgrading.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(), nullable=False, unique=True),
+        sa.Column("email", sa.String(), nullable=False, unique=True),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+
+    op.create_table(
+        "reviews",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("book_title", sa.String(), nullable=False),
+        sa.Column("author", sa.String(), nullable=False),
+        sa.Column("rating", sa.Integer(), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("cover_url", sa.String()),
+        sa.Column("status", sa.String()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+    )
+    op.create_index("ix_reviews_id", "reviews", ["id"])
+
+    op.create_table(
+        "comments",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("review_id", sa.Integer(), sa.ForeignKey("reviews.id")),
+    )
+    op.create_index("ix_comments_id", "comments", ["id"])
+
+    op.create_table(
+        "likes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("review_id", sa.Integer(), sa.ForeignKey("reviews.id")),
+    )
+    op.create_index("ix_likes_id", "likes", ["id"])
+
+
+def downgrade():
+    op.drop_table("likes")
+    op.drop_table("comments")
+    op.drop_table("reviews")
+    op.drop_table("users")
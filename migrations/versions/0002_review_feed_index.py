@@ -0,0 +1,22 @@
+"""composite index for the keyset-paginated feed
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_reviews_created_at_id", "reviews", ["created_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_reviews_created_at_id", table_name="reviews")
@@ -0,0 +1,44 @@
+"""materialized like/comment counters and unique likes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("reviews", sa.Column("like_count", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("reviews", sa.Column("comment_count", sa.Integer(), nullable=False, server_default="0"))
+
+    op.execute("""
+        DELETE FROM likes a
+        USING likes b
+        WHERE a.user_id = b.user_id AND a.review_id = b.review_id AND a.id > b.id
+    """)
+    op.create_unique_constraint("uq_likes_user_id_review_id", "likes", ["user_id", "review_id"])
+
+    op.execute("""
+        UPDATE reviews r SET like_count = l.cnt
+        FROM (SELECT review_id, count(*) AS cnt FROM likes GROUP BY review_id) l
+        WHERE l.review_id = r.id
+    """)
+    op.execute("""
+        UPDATE reviews r SET comment_count = c.cnt
+        FROM (SELECT review_id, count(*) AS cnt FROM comments GROUP BY review_id) c
+        WHERE c.review_id = r.id
+    """)
+
+
+def downgrade():
+    op.drop_constraint("uq_likes_user_id_review_id", "likes", type_="unique")
+    op.drop_column("reviews", "comment_count")
+    op.drop_column("reviews", "like_count")
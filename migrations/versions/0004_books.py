@@ -0,0 +1,65 @@
+"""books table with incrementally maintained aggregates
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+BOOK_KEY = (
+    "lower(regexp_replace(btrim({title}), '\\s+', ' ', 'g')) || '|' || "
+    "lower(regexp_replace(btrim({author}), '\\s+', ' ', 'g'))"
+)
+
+
+def upgrade():
+    op.create_table(
+        "books",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("author", sa.String(), nullable=False),
+        sa.Column("normalized_key", sa.String(), nullable=False, unique=True),
+        sa.Column("cover_url", sa.String()),
+        sa.Column("review_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("rating_sum", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_books_id", "books", ["id"])
+    op.create_index("ix_books_review_count_id", "books", ["review_count", "id"])
+
+    op.add_column("reviews", sa.Column("book_id", sa.Integer(), sa.ForeignKey("books.id")))
+    op.create_index("ix_reviews_book_id", "reviews", ["book_id"])
+
+    key = BOOK_KEY.format(title="book_title", author="author")
+    op.execute(f"""
+        INSERT INTO books (title, author, normalized_key, cover_url)
+        SELECT DISTINCT ON ({key}) book_title, author, {key}, cover_url
+        FROM reviews
+        ORDER BY {key}, created_at DESC
+    """)
+    op.execute(f"""
+        UPDATE reviews r SET book_id = b.id
+        FROM books b
+        WHERE b.normalized_key = {BOOK_KEY.format(title="r.book_title", author="r.author")}
+    """)
+    op.execute("""
+        UPDATE books b SET review_count = s.cnt, rating_sum = s.total
+        FROM (
+            SELECT book_id, count(*) AS cnt, sum(rating) AS total
+            FROM reviews GROUP BY book_id
+        ) s
+        WHERE s.book_id = b.id
+    """)
+
+
+def downgrade():
+    op.drop_index("ix_reviews_book_id", table_name="reviews")
+    op.drop_column("reviews", "book_id")
+    op.drop_table("books")
@@ -0,0 +1,46 @@
+"""full-text and trigram search over reviews
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(book_title, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(author, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(text, '')), 'B')"
+)
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column(
+        "reviews",
+        sa.Column("search_vector", TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True))
+    )
+    op.create_index("ix_reviews_search_vector", "reviews", ["search_vector"], postgresql_using="gin")
+    op.create_index(
+        "ix_reviews_book_title_trgm", "reviews", ["book_title"],
+        postgresql_using="gin", postgresql_ops={"book_title": "gin_trgm_ops"}
+    )
+    op.create_index(
+        "ix_reviews_author_trgm", "reviews", ["author"],
+        postgresql_using="gin", postgresql_ops={"author": "gin_trgm_ops"}
+    )
+
+
+def downgrade():
+    op.drop_index("ix_reviews_author_trgm", table_name="reviews")
+    op.drop_index("ix_reviews_book_title_trgm", table_name="reviews")
+    op.drop_index("ix_reviews_search_vector", table_name="reviews")
+    op.drop_column("reviews", "search_vector")
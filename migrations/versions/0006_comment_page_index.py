@@ -0,0 +1,22 @@
+"""keyset index for paginated comment threads
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_comments_review_id_created_at_id", "comments", ["review_id", "created_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_comments_review_id_created_at_id", table_name="comments")
@@ -0,0 +1,38 @@
+"""precomputed profile stats and profile feed index
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_reviews_user_id_created_at_id", "reviews", ["user_id", "created_at", "id"])
+
+    op.add_column("users", sa.Column("review_count", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("users", sa.Column("rating_sum", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("users", sa.Column("likes_received", sa.Integer(), nullable=False, server_default="0"))
+    op.execute("""
+        UPDATE users u SET review_count = s.cnt, rating_sum = s.total, likes_received = s.likes
+        FROM (
+            SELECT user_id, count(*) AS cnt, sum(rating) AS total, sum(like_count) AS likes
+            FROM reviews GROUP BY user_id
+        ) s
+        WHERE s.user_id = u.id
+    """)
+
+
+def downgrade():
+    op.drop_column("users", "likes_received")
+    op.drop_column("users", "rating_sum")
+    op.drop_column("users", "review_count")
+    op.drop_index("ix_reviews_user_id_created_at_id", table_name="reviews")
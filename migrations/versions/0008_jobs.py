@@ -0,0 +1,36 @@
+"""durable background job table
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("payload", postgresql.JSONB(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("run_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column("failed_at", sa.DateTime(timezone=True)),
+        sa.Column("last_error", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_jobs_run_at_id", "jobs", ["run_at", "id"], postgresql_where=sa.text("failed_at IS NULL"))
+
+
+def downgrade():
+    op.drop_index("ix_jobs_run_at_id", table_name="jobs")
+    op.drop_table("jobs")
@@ -0,0 +1,54 @@
+"""co-like neighbor tables for the personalized feed
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("reviews", sa.Column("likes_updated_at", sa.DateTime(timezone=True)))
+
+    op.create_table(
+        "review_neighbors",
+        sa.Column("review_id", sa.Integer(), sa.ForeignKey("reviews.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("neighbor_id", sa.Integer(), sa.ForeignKey("reviews.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("score", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_review_neighbors_neighbor_id", "review_neighbors", ["neighbor_id"])
+
+    op.create_table(
+        "user_neighbors",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("neighbor_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("score", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_user_neighbors_neighbor_id", "user_neighbors", ["neighbor_id"])
+
+    op.create_table(
+        "recommendation_runs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("mode", sa.String(), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("reviews", sa.Integer(), nullable=False),
+        sa.Column("users", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("recommendation_runs")
+    op.drop_index("ix_user_neighbors_neighbor_id", table_name="user_neighbors")
+    op.drop_table("user_neighbors")
+    op.drop_index("ix_review_neighbors_neighbor_id", table_name="review_neighbors")
+    op.drop_table("review_neighbors")
+    op.drop_column("reviews", "likes_updated_at")
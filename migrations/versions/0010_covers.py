@@ -0,0 +1,63 @@
+"""cover proxy source table; rewrite stored cover URLs to the proxied form
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+OLD_PLACEHOLDER = "https://placehold.co/400x600/18181b/ffffff?text=NO+COVER"
+PLACEHOLDER = "/covers/placeholder.svg"
+URL_HASH = "encode(sha256(convert_to(cover_url, 'UTF8')), 'hex')"
+ALLOWED_SOURCE = r"^https?://(books\.google\.com|books\.googleusercontent\.com)([/?#]|$)"
+
+
+def upgrade():
+    op.create_table(
+        "covers",
+        sa.Column("hash", sa.String(64), primary_key=True),
+        sa.Column("source_url", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    for table in ("reviews", "books"):
+        op.execute(
+            sa.text(f"UPDATE {table} SET cover_url = :new WHERE cover_url = :old")
+            .bindparams(new=PLACEHOLDER, old=OLD_PLACEHOLDER)
+        )
+    op.execute(sa.text(f"""
+        INSERT INTO covers (hash, source_url)
+        SELECT {URL_HASH}, cover_url
+        FROM (SELECT cover_url FROM reviews UNION SELECT cover_url FROM books) AS urls
+        WHERE cover_url ~* :allowed
+    """).bindparams(allowed=ALLOWED_SOURCE))
+    for table in ("reviews", "books"):
+        op.execute(
+            sa.text(f"UPDATE {table} SET cover_url = '/covers/' || {URL_HASH} WHERE cover_url ~* :allowed")
+            .bindparams(allowed=ALLOWED_SOURCE)
+        )
+        op.execute(
+            sa.text(f"UPDATE {table} SET cover_url = :new WHERE cover_url ~* '^https?://'")
+            .bindparams(new=PLACEHOLDER)
+        )
+
+
+def downgrade():
+    for table in ("reviews", "books"):
+        op.execute(f"""
+            UPDATE {table} SET cover_url = covers.source_url
+            FROM covers
+            WHERE {table}.cover_url = '/covers/' || covers.hash
+        """)
+        op.execute(
+            sa.text(f"UPDATE {table} SET cover_url = :old WHERE cover_url = :new")
+            .bindparams(new=PLACEHOLDER, old=OLD_PLACEHOLDER)
+        )
+    op.drop_table("covers")
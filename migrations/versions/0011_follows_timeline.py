@@ -0,0 +1,46 @@
+"""follow graph and fan-out-on-write home timelines
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("users", sa.Column("follower_count", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("users", sa.Column("following_count", sa.Integer(), nullable=False, server_default="0"))
+
+    op.create_table(
+        "follows",
+        sa.Column("follower_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("followee_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_follows_followee_id_follower_id", "follows", ["followee_id", "follower_id"])
+
+    op.create_table(
+        "timeline_entries",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("review_id", sa.Integer(), primary_key=True),
+        sa.Column("author_id", sa.Integer(), nullable=False),
+    )
+    op.create_index("ix_timeline_entries_review_id", "timeline_entries", ["review_id"])
+
+
+def downgrade():
+    op.drop_index("ix_timeline_entries_review_id", table_name="timeline_entries")
+    op.drop_table("timeline_entries")
+    op.drop_index("ix_follows_followee_id_follower_id", table_name="follows")
+    op.drop_table("follows")
+    op.drop_column("users", "following_count")
+    op.drop_column("users", "follower_count")
@@ -0,0 +1,54 @@
+"""materialized per-user recommendations
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "user_recommendations",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("review_id", sa.Integer(), sa.ForeignKey("reviews.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("score", sa.Float(), nullable=False),
+    )
+    op.create_index(
+        "ix_user_recommendations_user_id_score_review_id", "user_recommendations", ["user_id", "score", "review_id"]
+    )
+    op.create_index("ix_user_recommendations_review_id", "user_recommendations", ["review_id"])
+    op.execute("""
+        INSERT INTO user_recommendations (user_id, review_id, score)
+        SELECT user_id, review_id, score FROM (
+            SELECT c.user_id, c.review_id, sum(c.score) AS score,
+                   row_number() OVER (PARTITION BY c.user_id ORDER BY sum(c.score) DESC, c.review_id DESC) AS rank
+            FROM (
+                SELECT l.user_id, n.neighbor_id AS review_id, n.score
+                FROM review_neighbors n JOIN likes l ON l.review_id = n.review_id
+                UNION ALL
+                SELECT n.user_id, r.id, n.score * r.rating / 10.0
+                FROM user_neighbors n JOIN reviews r ON r.user_id = n.neighbor_id
+                WHERE r.rating >= 8
+            ) c
+            JOIN reviews r ON r.id = c.review_id
+            WHERE r.user_id IS DISTINCT FROM c.user_id
+              AND NOT EXISTS (SELECT 1 FROM likes l WHERE l.user_id = c.user_id AND l.review_id = c.review_id)
+            GROUP BY c.user_id, c.review_id
+        ) ranked
+        WHERE rank <= 500
+    """)
+
+
+def downgrade():
+    op.drop_index("ix_user_recommendations_review_id", table_name="user_recommendations")
+    op.drop_index("ix_user_recommendations_user_id_score_review_id", table_name="user_recommendations")
+    op.drop_table("user_recommendations")
@@ -0,0 +1,23 @@
+"""track when a user's own likes changed for incremental recommendations
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("users", sa.Column("likes_updated_at", sa.DateTime(timezone=True)))
+
+
+def downgrade():
+    op.drop_column("users", "likes_updated_at")
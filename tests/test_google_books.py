@@ -0,0 +1,138 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+os.environ["GOOGLE_BOOKS_TIMEOUT"] = "0.5"
+os.environ["GOOGLE_BOOKS_CACHE_PATH"] = ""
+
+from app import utils
+from app.utils import BookLookupError, fetch_book_info
+
+VOLUME = {
+    "items": [{
+        "volumeInfo": {
+            "title": "Dune",
+            "authors": ["Frank Herbert"],
+            "description": "Desert planet",
+            "imageLinks": {"thumbnail": "http://books.google.com/books/content?id=dune&img=1"},
+        }
+    }]
+}
+
+
+class FakeGoogleBooks(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)["q"][0]
+        self.requests.append(query)
+        if query == "slow":
+            time.sleep(2)
+            self._send(200, VOLUME)
+        elif query == "broken":
+            self._send(500, {"error": "backend"})
+        elif query == "garbage":
+            self._send(200, b"not json")
+        elif query == "missing":
+            self._send(200, {"totalItems": 0})
+        else:
+            time.sleep(0.05)
+            self._send(200, VOLUME)
+
+    def _send(self, status, body):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FakeGoogleBooks)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/books/v1/volumes"
+    httpd.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def google_books(server, monkeypatch):
+    monkeypatch.setattr(utils, "GOOGLE_BOOKS_URL", server)
+    monkeypatch.setattr(utils, "_client", None)
+    utils.clear_book_cache()
+    FakeGoogleBooks.requests = []
+    yield FakeGoogleBooks.requests
+    utils.clear_book_cache()
+
+
+def run(coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await utils.close_http_client()
+    return asyncio.run(main())
+
+
+def test_success_is_parsed_and_cached(google_books):
+    async def lookups():
+        return await fetch_book_info("  Dune "), await fetch_book_info("dune")
+
+    first, second = run(lookups())
+    assert first == {
+        "title": "Dune",
+        "author": "Frank Herbert",
+        "cover_url": "https://books.google.com/books/content?id=dune&img=1",
+        "description": "Desert planet",
+    }
+    assert second == first
+    assert google_books == ["dune"]
+
+
+def test_concurrent_lookups_share_one_request(google_books):
+    async def lookups():
+        return await asyncio.gather(*(fetch_book_info("Dune") for _ in range(5)))
+
+    results = run(lookups())
+    assert all(result["title"] == "Dune" for result in results)
+    assert google_books == ["dune"]
+
+
+def test_not_found_is_cached_as_none(google_books):
+    async def lookups():
+        return await fetch_book_info("missing"), await fetch_book_info("missing")
+
+    assert run(lookups()) == (None, None)
+    assert google_books == ["missing"]
+
+
+def test_timeout_returns_none_and_is_not_cached(google_books):
+    started = time.perf_counter()
+    assert run(fetch_book_info("slow")) is None
+    assert time.perf_counter() - started < 1.5
+    with pytest.raises(BookLookupError):
+        run(fetch_book_info("slow", raise_on_error=True))
+    assert google_books == ["slow", "slow"]
+
+
+@pytest.mark.parametrize("title", ["broken", "garbage"])
+def test_errors_return_none_and_are_not_cached(google_books, title):
+    assert run(fetch_book_info(title)) is None
+    with pytest.raises(BookLookupError):
+        run(fetch_book_info(title, raise_on_error=True))
+    assert google_books == [title, title]